@@ -1,8 +1,11 @@
 import os
-from flask import Flask, render_template
+from flask import Flask, render_template, jsonify, g, has_app_context, has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
+from itertools import tee
+from utils.hindi import to_hindi_name, to_hindi_batch, cache_stats as hindi_cache_stats
 
 # Initialize extensions
 db = SQLAlchemy()
@@ -15,22 +18,48 @@ login_manager = LoginManager()
 def format_inr(value):
     try:
         value = float(value or 0)
-        s = f"{value:.2f}"
-        int_part, dec_part = s.split('.')
-
-        if len(int_part) <= 3:
-            return f"₹{int_part}.{dec_part}"
-
-        # Grouping digits for Indian format
-        last_three = int_part[-3:]
-        rest = int_part[:-3]
-        rest = ','.join([rest[max(i - 2, 0):i] for i in range(len(rest), 0, -2)][::-1]).lstrip(',')
-
-        formatted = f"{rest},{last_three}" if rest else last_three
-        return f"₹{formatted}.{dec_part}"
+        return _group_inr(f"{value:.2f}")
     except Exception:
         return "₹0.00"
 
+@lru_cache(maxsize=None)
+def _inr_group_slices(n):
+    # Slices that split n leading digits into Indian 2-digit groups from the right
+    head = n % 2 or 2
+    return [slice(0, head)] + [slice(i, i + 2) for i in range(head, n, 2)]
+
+@lru_cache(maxsize=65536)
+def _group_inr(s):
+    # Keyed on the 2-dp string (not the float) so -0.0/0.0 and NaN stay exact.
+    if s[-3:-2] != '.':
+        return "₹0.00"  # inf / nan have no decimal part
+
+    int_len = len(s) - 3
+    if int_len <= 3:
+        return f"₹{s}"
+
+    # Grouping digits for Indian format: last three, then pairs
+    rest_len = int_len - 3
+    groups = [s[sl] for sl in _inr_group_slices(rest_len)]
+    return f"₹{','.join(groups)},{s[rest_len:]}"
+
+def format_inr_many(values):
+    """format_inr over a whole column, lazily; each distinct amount is formatted only once."""
+    seen = {}
+    for value in values:
+        try:
+            formatted = seen[value]
+        except KeyError:
+            formatted = seen[value] = format_inr(value)
+        except TypeError:  # unhashable; format directly
+            formatted = format_inr(value)
+        yield formatted
+
+def with_inr(rows, attribute):
+    """(row, formatted row.<attribute>) pairs for a table body; streamed rows stay streamed."""
+    rows, amounts = tee(rows)
+    return zip(rows, format_inr_many(getattr(row, attribute) for row in amounts))
+
 def kg_to_mt(value):
     try:
         return "{:.2f} MT".format((value or 0) / 1000)
@@ -38,20 +67,65 @@ def kg_to_mt(value):
         return "0.00 MT"
 
 def format_date(value):
+    # Ledgers repeat the same dates heavily, so dates and date strings are memoized
+    if isinstance(value, (str, date)):  # datetime is a date subclass
+        return _format_date(value)
     try:
         if hasattr(value, "strftime"):
             return value.strftime('%d-%m-%Y')
-        elif isinstance(value, str):
+        return value
+    except:
+        return value
+
+@lru_cache(maxsize=8192)
+def _format_date(value):
+    try:
+        if not isinstance(value, str):
+            return value.strftime('%d-%m-%Y')
+        # Fast path for ISO "YYYY-MM-DD" and "YYYY-MM-DD HH:MM:SS" (no exception round-trip)
+        if len(value) == 10 and value[4] == '-' and value[7] == '-':
+            dt = date.fromisoformat(value)
+        elif len(value) == 19 and value[4] == '-' and value[7] == '-' and value[10] == ' ':
+            dt = datetime.fromisoformat(value)
+        else:
             try:
                 dt = datetime.strptime(value, "%Y-%m-%d")
             except ValueError:
                 dt = datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
-            return dt.strftime('%d-%m-%Y')
-        else:
-            return value
+        return dt.strftime('%d-%m-%Y')
     except:
         return value
 
+# -------------------
+# Page Language
+# -------------------
+
+LANGUAGES = ('hi', 'en')
+LANG_COOKIE = 'ui-lang'
+
+def get_lang():
+    # ?lang= wins (and is remembered in a cookie by create_app), then the cookie, then Hindi
+    if not has_request_context():
+        return 'hi'
+    lang = request.args.get('lang') or request.cookies.get(LANG_COOKIE)
+    return lang if lang in LANGUAGES else 'hi'
+
+def to_hindi(value):
+    # English pages show names as entered
+    if get_lang() == 'en':
+        return value
+    # Views can batch-translate a whole page up front (prime_hindi_names); fall back per value
+    names = g.get('hindi_names') if has_app_context() else None
+    if names is not None and value in names:
+        return names[value]
+    return to_hindi_name(value)
+
+def prime_hindi_names(values):
+    if get_lang() == 'en':
+        return
+    names = g.setdefault('hindi_names', {})
+    names.update(to_hindi_batch(v for v in set(values) if v and v not in names))
+
 # -------------------
 # Create Flask App
 # -------------------
@@ -63,22 +137,105 @@ def create_app():
 
     app.config['SECRET_KEY'] = '5e4a6264c704ebe73ae348c4b3283d0b43ba1d04ab380c83dd4ab523f3f2c39d'
     basedir = os.path.abspath(os.path.dirname(__file__))
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, '../instance/warehouse.db')
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+        'DATABASE_URL', 'sqlite:///' + os.path.join(basedir, '../instance/warehouse.db'))
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Serve stockist summaries from the materialized stockist_ledger_summary table.
+    # Only enable once it has been built (`flask rebuild-ledger-summary`) and every
+    # process that writes ledger rows loads app.ledger_summary's listeners.
+    app.config['USE_LEDGER_SUMMARY'] = os.environ.get('USE_LEDGER_SUMMARY') == '1'
+    # Rendered dashboard sections are cached per owner/language/ledger version.
+    # Writers outside this app don't bump versions, so the TTL bounds staleness (0 disables).
+    app.config['FRAGMENT_CACHE_TTL'] = int(os.environ.get('FRAGMENT_CACHE_TTL', 300))
+    app.config['FRAGMENT_CACHE_SIZE'] = 512
+    app.config['FRAGMENT_CACHE_PATH'] = os.environ.get('FRAGMENT_CACHE_PATH')  # optional shared SQLite file
+    # Mixed into dashboard ETags; change it on deploy so template changes reach cached clients
+    app.config['ETAG_SALT'] = os.environ.get('ETAG_SALT')
+    # Stockists with more history rows than this get a streamed dashboard (0 disables)
+    app.config['STREAM_HISTORY_ROWS'] = int(os.environ.get('STREAM_HISTORY_ROWS', 5000))
+    app.config['STREAM_BATCH_SIZE'] = 500
+    # Seconds a session's cached seller/stockist identity is trusted without a query
+    app.config['IDENTITY_TTL'] = 300
+    app.config['COMPRESS_MIN_SIZE'] = 1024      # bytes; smaller bodies go out as-is
+    app.config['COMPRESS_BR_QUALITY'] = 5       # 0-11; 5 is the usual on-the-fly sweet spot
+    app.config['COMPRESS_GZIP_LEVEL'] = 6
+    app.config['COMPRESS_CACHE_SIZE'] = 256     # compressed dashboards kept per (ETag, encoding)
+    # PDF statements: rendered on a worker pool and kept on disk until the ledgers change
+    app.config['STATEMENT_DIR'] = os.environ.get('STATEMENT_DIR', os.path.join(basedir, '../instance/statements'))
+    app.config['STATEMENT_WORKERS'] = 2
+    app.config['STATEMENT_WAIT'] = 10           # seconds a request waits before answering 202
+    app.config['STATEMENT_FONT_PATH'] = os.environ.get('STATEMENT_FONT_PATH')  # TTF with ₹; default core Helvetica
+    # Translate the DB's distinct names into the shared Hindi store on a background
+    # thread at startup (remote calls go through the translator's circuit breaker).
+    # Set to 0 to warm only via `flask warm-hindi-cache`, e.g. in one-off CLI processes.
+    app.config['HINDI_WARM_ON_START'] = os.environ.get('HINDI_WARM_ON_START', '1') == '1'
 
     db.init_app(app)
     login_manager.init_app(app)
 
     # Register custom filters
     app.jinja_env.filters['format_inr'] = format_inr
+    app.jinja_env.filters['with_inr'] = with_inr
     app.jinja_env.filters['kg_to_mt'] = kg_to_mt
     app.jinja_env.filters['format_date'] = format_date
+    app.jinja_env.filters['to_hindi'] = to_hindi
+
+    # Render only the requested language
+    @app.context_processor
+    def inject_lang():
+        return {'lang': get_lang()}
+
+    @app.after_request
+    def remember_lang(response):
+        lang = request.args.get('lang')
+        if lang in LANGUAGES and request.cookies.get(LANG_COOKIE) != lang:
+            response.set_cookie(LANG_COOKIE, lang, max_age=365 * 24 * 3600, samesite='Lax')
+        return response
+
+    # mobile -> seller/stockist identity, cached in the session and per process
+    from app.identity import init_identity
+    init_identity(app)
 
     # Register Blueprints
     from app.routes.user.auth import user_auth_bp
     from app.routes.user.views import user_view_bp
+    from app.routes.user.api import user_api_bp
     app.register_blueprint(user_auth_bp)
     app.register_blueprint(user_view_bp)
+    app.register_blueprint(user_api_bp)
+
+    # Resolve seller_id / stockist_id on ledger rows written through this app
+    from app.party_keys import register_listeners as register_party_keys
+    register_party_keys()
+
+    # Keep purchase.date ISO when another writer stores a legacy date string
+    from app.migrations import register_listeners as register_date_triggers
+    register_date_triggers()
+
+    # Keep the materialized ledger summary current on every write
+    from app.ledger_summary import register_listeners
+    register_listeners()
+
+    # Dashboard fragment cache (also bumps ledger versions on every write)
+    from app.fragment_cache import init_fragment_cache
+    init_fragment_cache(app)
+
+    # br/gzip response compression, negotiated per request
+    from app.compression import init_compression
+    init_compression(app)
+
+    # PDF statement store and background renderer
+    from app.statements import init_statements
+    init_statements(app)
+
+    # Register CLI commands
+    from app.cli import register_commands
+    register_commands(app)
+
+    # Prime the Hindi translation store from the DB without delaying startup
+    if app.config['HINDI_WARM_ON_START']:
+        from app.cli import start_hindi_warmup
+        start_hindi_warmup(app)
 
     # Root Route
     @app.route('/')
@@ -90,4 +247,9 @@ def create_app():
     def test():
         return "✅ Test route working from VPS!"
 
+    # Transliteration cache counters (for monitoring)
+    @app.route('/stats/hindi-cache')
+    def hindi_cache():
+        return jsonify(hindi_cache_stats())
+
     return app
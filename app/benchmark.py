@@ -0,0 +1,169 @@
+import json
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from sqlalchemy import event, func, select
+from app import db
+from app.models import Seller, Stockist, Purchase, StockData
+
+DASHBOARD_PATHS = ('/user/home', '/user/seller', '/user/stockist')
+PERCENTILES = (50, 90, 95, 99)
+LATENCY_NOISE_MS = 1.0   # smaller latency differences are never reported as regressions
+
+
+# -------------------
+# Measurement
+# -------------------
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    rank = max(1, -(-pct * len(values) // 100))  # ceil
+    return values[rank - 1]
+
+
+@contextmanager
+def count_queries(engine):
+    counter = {'queries': 0}
+
+    def _count(*args):
+        counter['queries'] += 1
+
+    event.listen(engine, 'before_cursor_execute', _count)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', _count)
+
+
+def reset_caches(app):
+    """Drop every server-side cache a dashboard request can hit."""
+    fragments = app.extensions.get('fragment_cache')
+    if fragments is not None:
+        fragments.memory.clear()
+        if fragments.backend is not None:
+            fragments.backend.clear()
+    if 'compressed_pages' in app.extensions:
+        app.extensions['compressed_pages'].clear()
+    if 'identity_cache' in app.extensions:
+        app.extensions['identity_cache'].entries.clear()
+
+
+def measure(app, path, mobile, label='', repeat=30, cold=False, accept_encoding='br, gzip'):
+    """Latency percentiles (ms), queries and peak traced memory for one page as one user.
+
+    One warm-up request comes first. Peak memory is taken from one extra
+    request, since tracemalloc slows down everything it traces.
+    """
+    # Requests run on a fresh thread, which starts outside any app context (e.g. the
+    # CLI's), so each gets its own ``g`` and DB session as it would in production.
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(_measure, app, path, mobile, label, repeat, cold, accept_encoding).result()
+
+
+def _measure(app, path, mobile, label, repeat, cold, accept_encoding):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['mobile'] = mobile
+    headers = {'Accept-Encoding': accept_encoding}
+
+    def request():
+        response = client.get(path, headers=headers)
+        body = response.get_data()  # drains streamed pages too
+        return response.status_code, len(body)
+
+    request()
+    with app.app_context():
+        engine = db.engine
+    latencies, queries = [], []
+    for _ in range(repeat):
+        if cold:
+            reset_caches(app)
+        with count_queries(engine) as counter:
+            start = time.perf_counter()
+            status, size = request()
+            latencies.append((time.perf_counter() - start) * 1000)
+        queries.append(counter['queries'])
+
+    if cold:
+        reset_caches(app)
+    tracemalloc.start()
+    try:
+        request()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    result = {'path': path, 'label': label, 'cache': 'cold' if cold else 'warm',
+              'mobile': mobile, 'status': status, 'bytes': size,
+              'queries': max(queries), 'peak_kb': round(peak / 1024, 1),
+              'max_ms': round(latencies[-1], 2)}
+    for pct in PERCENTILES:
+        result[f'p{pct}_ms'] = round(percentile(latencies, pct), 2)
+    return result
+
+
+# -------------------
+# Scenarios
+# -------------------
+
+def _by_volume(party, ledger, owner_column):
+    # Mobiles of parties with any history, lightest first
+    return db.session.scalars(
+        select(party.mobile)
+        .join(ledger, owner_column == party.id)
+        .group_by(party.id)
+        .order_by(func.count(ledger.id), party.id)
+    ).all()
+
+
+def default_cases():
+    """[(path, label, mobile)]: a typical and the heaviest seller and stockist."""
+    cases = []
+    for path, party, ledger, owner_column in (
+            ('/user/seller', Seller, Purchase, Purchase.seller_id),
+            ('/user/stockist', Stockist, StockData, StockData.stockist_id)):
+        ranked = _by_volume(party, ledger, owner_column)
+        if not ranked:
+            continue
+        role = party.__tablename__
+        typical, heaviest = ranked[len(ranked) // 2], ranked[-1]
+        if path == '/user/seller':
+            cases.append(('/user/home', f'typical {role}', typical))
+        cases.append((path, f'typical {role}', typical))
+        cases.append((path, f'heaviest {role}', heaviest))
+    return cases
+
+
+# -------------------
+# Baselines
+# -------------------
+
+def case_key(result):
+    return f"{result['path']} {result['label']} [{result['cache']}]"
+
+
+def save_results(path, results):
+    with open(path, 'w') as fh:
+        json.dump({case_key(r): r for r in results}, fh, indent=2)
+
+
+def regressions(results, baseline_path, tolerance=0.2):
+    """(lines for every case slower, chattier or bigger than the baseline, cases compared)."""
+    with open(baseline_path) as fh:
+        baseline = json.load(fh)
+    found, compared = [], 0
+    for result in results:
+        base = baseline.get(case_key(result))
+        if base is None:
+            continue
+        compared += 1
+        if result['queries'] > base['queries']:
+            found.append(f"{case_key(result)}: queries {base['queries']} -> {result['queries']}")
+        for metric, noise in (('p50_ms', LATENCY_NOISE_MS), ('p95_ms', LATENCY_NOISE_MS), ('peak_kb', 0)):
+            if result[metric] > base[metric] * (1 + tolerance) and result[metric] - base[metric] > noise:
+                found.append(f"{case_key(result)}: {metric} {base[metric]} -> {result[metric]}")
+    return found, compared
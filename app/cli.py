@@ -0,0 +1,262 @@
+import click
+from flask.cli import with_appcontext
+from app import db
+
+
+# -------------------
+# Schema Maintenance
+# -------------------
+
+def ensure_indexes():
+    # create_all() skips tables that already exist, so indexes added to the
+    # models later never reach an existing instance/warehouse.db on their own.
+    import app.models  # noqa: F401  (register every table on db.metadata)
+
+    inspector = db.inspect(db.engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        columns = {c['name'] for c in inspector.get_columns(table.name)}
+        for index in table.indexes:
+            # Indexes on columns a pending migration adds (e.g. seller_id) wait for it
+            if index.name not in existing and all(c.name in columns for c in index.columns):
+                index.create(db.engine)
+                created.append(index.name)
+    return created
+
+
+@click.command('ensure-indexes')
+@with_appcontext
+def ensure_indexes_command():
+    """Create any model index missing from the database."""
+    created = ensure_indexes()
+    for name in created:
+        click.echo(f"created {name}")
+    click.echo(f"{len(created)} index(es) created.")
+
+
+@click.command('migrate-purchase-dates')
+@with_appcontext
+def migrate_purchase_dates_command():
+    """Convert legacy purchase.date strings into a real DATE column."""
+    from app.migrations import migrate_purchase_dates
+    try:
+        count = migrate_purchase_dates()
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+    created = ensure_indexes()
+    click.echo(f"{count} purchase date(s) rewritten; {len(created)} index(es) created.")
+
+
+@click.command('migrate-party-ids')
+@with_appcontext
+def migrate_party_ids_command():
+    """Add, backfill and index seller_id / stockist_id on the ledger tables."""
+    from app.migrations import migrate_party_ids
+    report = migrate_party_ids()
+    for table, (filled, unmatched) in report.items():
+        click.echo(f"{table}: {filled} row(s) linked, {unmatched} without a matching party")
+    created = ensure_indexes()
+    click.echo(f"{len(created)} index(es) created.")
+    if any(unmatched for _, unmatched in report.values()):
+        click.echo("Unlinked rows are hidden from dashboards until their name matches a seller/stockist.")
+
+
+# -------------------
+# Ledger Summary
+# -------------------
+
+@click.command('rebuild-ledger-summary')
+@with_appcontext
+def rebuild_ledger_summary_command():
+    """Recompute the stockist ledger summary table from the ledgers."""
+    from app.ledger_summary import rebuild_summaries
+    count = rebuild_summaries()
+    click.echo(f"{count} summary row(s) written.")
+
+
+@click.command('check-ledger-summary')
+@click.option('--stockist', 'stockists', multiple=True, help='Only check these stockist names.')
+@with_appcontext
+def check_ledger_summary_command(stockists):
+    """Compare the stockist ledger summary table with the ledgers."""
+    from app.models import Stockist
+    from app.ledger_summary import check_summaries
+    stockist_ids = None
+    if stockists:
+        stockist_ids = [s.id for s in Stockist.query.filter(Stockist.name.in_(stockists))]
+    mismatches = check_summaries(stockist_ids)
+    for key, stored, expected in mismatches:
+        click.echo(f"{key}: stored={stored} expected={expected}")
+    if mismatches:
+        raise click.ClickException(f"{len(mismatches)} summary row(s) out of date; run rebuild-ledger-summary.")
+    click.echo("Ledger summary is consistent.")
+
+
+# -------------------
+# Hindi Transliteration
+# -------------------
+
+def distinct_display_values():
+    # Every value the dashboards pass through the to_hindi filter, plus party names
+    from app.models import Seller, Stockist, Purchase, Payment, StockData, StockExit, LoanData, MarginData
+
+    columns = [Seller.name, Stockist.name, LoanData.loan_type]
+    for model in (Purchase, Payment, StockData, StockExit, LoanData, MarginData):
+        columns += [model.warehouse, model.commodity]
+
+    values = set()
+    for column in columns:
+        values.update(v for (v,) in db.session.query(column).distinct() if v)
+    return values
+
+
+@click.command('warm-hindi-cache')
+@with_appcontext
+def warm_hindi_cache_command():
+    """Translate every distinct name in the DB into the shared Hindi store (also run in the background by create_app)."""
+    from utils.hindi import warm_cache, cache_stats
+    count = warm_cache(distinct_display_values())
+    click.echo(f"{count} distinct value(s) warmed.")
+    click.echo(cache_stats())
+
+
+def start_hindi_warmup(app):
+    """Warm the Hindi store on a daemon thread so startup never waits on the translator."""
+    import threading
+
+    def warm():
+        from utils.hindi import warm_cache
+        with app.app_context():
+            try:
+                count = warm_cache(distinct_display_values())
+                app.logger.info("Hindi cache warmed with %d distinct value(s)", count)
+            except Exception:
+                # e.g. a fresh DB without tables yet; the CLI command can be rerun later
+                app.logger.exception("Hindi cache warm-up failed")
+            finally:
+                db.session.remove()
+
+    thread = threading.Thread(target=warm, name='hindi-warm', daemon=True)
+    thread.start()
+    return thread
+
+
+# -------------------
+# Compression Benchmark
+# -------------------
+
+@click.command('benchmark-compression')
+@click.option('--mobile', required=True, help='Log in as the seller/stockist with this mobile number.')
+@click.option('--path', 'paths', multiple=True, default=('/user/seller', '/user/stockist'), show_default=True)
+@click.option('--repeat', default=20, show_default=True, help='Encodes per page and encoding.')
+@with_appcontext
+def benchmark_compression_command(mobile, paths, repeat):
+    """Report bytes on the wire and CPU per encode for the dashboards."""
+    import time
+    from flask import current_app
+    from app.compression import brotli, compress
+
+    client = current_app.test_client()
+    with client.session_transaction() as sess:
+        sess['mobile'] = mobile
+
+    encodings = ['gzip', 'br'] if brotli is not None else ['gzip']
+    for path in paths:
+        response = client.get(path, headers={'Accept-Encoding': 'identity'})
+        body = response.get_data()
+        click.echo(f"{path}: {response.status_code}, {len(body):,} bytes uncompressed")
+        for encoding in encodings:
+            start = time.process_time()
+            for _ in range(repeat):
+                data = compress(body, encoding, current_app.config)
+            cpu_ms = (time.process_time() - start) * 1000 / repeat
+            click.echo(f"  {encoding:<5} {len(data):>9,} bytes  {len(data) / len(body):6.1%}  {cpu_ms:7.2f} ms CPU")
+
+
+# -------------------
+# Synthetic Data and Dashboard Benchmarks
+# -------------------
+
+@click.command('generate-synthetic-data')
+@click.option('--sellers', default=1000, show_default=True)
+@click.option('--stockists', default=1000, show_default=True)
+@click.option('--rows', default=20, show_default=True, help='Mean ledger rows per party.')
+@click.option('--skew', default=1.0, show_default=True, help='0 = every party alike; 1 = Zipf-distributed volumes.')
+@click.option('--overlap', default=0.1, show_default=True, help='Fraction of stockists who are also sellers.')
+@click.option('--seed', default=1, show_default=True)
+@click.option('--reset', is_flag=True, help='Drop and recreate every table first.')
+@with_appcontext
+def generate_synthetic_data_command(sellers, stockists, rows, skew, overlap, seed, reset):
+    """Fill the configured DB with reproducible synthetic parties and ledgers."""
+    import time
+    from app.synthetic import generate
+
+    if reset:
+        click.confirm(f"Drop every table in {db.engine.url}?", abort=True)
+        db.drop_all()
+    start = time.perf_counter()
+    counts = generate(sellers=sellers, stockists=stockists, rows=rows, skew=skew, overlap=overlap, seed=seed)
+    for table, count in counts.items():
+        click.echo(f"{table}: {count:,} row(s)")
+    click.echo(f"Done in {time.perf_counter() - start:,.1f}s.")
+
+
+@click.command('benchmark-dashboards')
+@click.option('--mobile', 'mobiles', multiple=True,
+              help='Benchmark as these mobiles (default: a typical and the heaviest seller and stockist).')
+@click.option('--path', 'paths', multiple=True, help='Pages to request with --mobile.')
+@click.option('--repeat', default=30, show_default=True, help='Timed requests per case.')
+@click.option('--cold', is_flag=True, help='Clear server-side caches before every request.')
+@click.option('--save', type=click.Path(dir_okay=False), help='Write the results to this JSON file.')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False),
+              help='Compare with a saved run; exit 1 on any regression.')
+@click.option('--tolerance', default=0.2, show_default=True, help='Allowed slowdown/growth vs --baseline.')
+@with_appcontext
+def benchmark_dashboards_command(mobiles, paths, repeat, cold, save, baseline, tolerance):
+    """Latency percentiles, query counts and peak memory for the user dashboards."""
+    from flask import current_app
+    from app.benchmark import DASHBOARD_PATHS, default_cases, measure, save_results, regressions
+
+    app = current_app._get_current_object()
+    if mobiles:
+        cases = [(path, mobile, mobile) for mobile in mobiles for path in paths or DASHBOARD_PATHS]
+    else:
+        cases = default_cases()
+    if not cases:
+        raise click.ClickException("No sellers or stockists with ledger rows; run generate-synthetic-data first.")
+
+    click.echo(f"{'case':<38} {'status':>6} {'bytes':>9} {'queries':>7} "
+               f"{'p50':>8} {'p95':>8} {'p99':>8} {'peak KB':>9}")
+    results = []
+    for path, label, mobile in cases:
+        result = measure(app, path, mobile, label, repeat=repeat, cold=cold)
+        results.append(result)
+        click.echo(f"{path + ' ' + label:<38} {result['status']:>6} {result['bytes']:>9,} {result['queries']:>7} "
+                   f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+                   f"{result['peak_kb']:>9,.1f}")
+
+    if save:
+        save_results(save, results)
+        click.echo(f"Saved to {save}.")
+    if baseline:
+        found, compared = regressions(results, baseline, tolerance)
+        for line in found:
+            click.echo(f"REGRESSION {line}")
+        if found:
+            raise SystemExit(1)
+        click.echo(f"No regressions against {baseline} ({compared} case(s) compared).")
+
+
+def register_commands(app):
+    app.cli.add_command(ensure_indexes_command)
+    app.cli.add_command(migrate_purchase_dates_command)
+    app.cli.add_command(migrate_party_ids_command)
+    app.cli.add_command(rebuild_ledger_summary_command)
+    app.cli.add_command(check_ledger_summary_command)
+    app.cli.add_command(warm_hindi_cache_command)
+    app.cli.add_command(benchmark_compression_command)
+    app.cli.add_command(generate_synthetic_data_command)
+    app.cli.add_command(benchmark_dashboards_command)
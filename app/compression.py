@@ -0,0 +1,136 @@
+import zlib
+from flask import request
+from app.fragment_cache import LRUCache
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv',
+    'application/json', 'application/javascript', 'image/svg+xml',
+}
+
+
+# -------------------
+# Encoders
+# -------------------
+
+class _GzipStream:
+    def __init__(self, level):
+        # wbits=31: gzip header and trailer, so the output is a valid .gz stream
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def process(self, data):
+        return self._z.compress(data)
+
+    def flush(self):
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._z.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._c = brotli.Compressor(mode=brotli.MODE_TEXT, quality=quality)
+
+    def process(self, data):
+        return self._c.process(data)
+
+    def flush(self):
+        return self._c.flush()
+
+    def finish(self):
+        return self._c.finish()
+
+
+def encoder(encoding, config):
+    if encoding == 'br':
+        return _BrotliStream(config['COMPRESS_BR_QUALITY'])
+    return _GzipStream(config['COMPRESS_GZIP_LEVEL'])
+
+
+def compress(data, encoding, config):
+    """Compress a whole body in one shot."""
+    stream = encoder(encoding, config)
+    return stream.process(data) + stream.finish()
+
+
+def compress_chunks(chunks, encoding, config):
+    # Flush after every chunk so streamed pages still reach the browser progressively
+    stream = encoder(encoding, config)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = stream.process(chunk) + stream.flush()
+        if data:
+            yield data
+    yield stream.finish()
+
+
+def negotiate(accept_encodings):
+    """'br', 'gzip' or None for a request's Accept-Encoding (server prefers br)."""
+    offers = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best = max(offers, key=lambda enc: accept_encodings[enc])
+    return best if accept_encodings[best] > 0 else None
+
+
+# -------------------
+# Middleware
+# -------------------
+
+def _should_compress(response):
+    return (
+        200 <= response.status_code < 300
+        and response.status_code != 204
+        and 'Content-Encoding' not in response.headers
+        and not response.direct_passthrough
+        and response.mimetype in COMPRESSIBLE_MIMETYPES
+    )
+
+
+def compress_response(response, app):
+    config = app.config
+    response.vary.add('Accept-Encoding')
+    if not _should_compress(response):
+        return response
+    encoding = negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_chunks(response.response, encoding, config)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < config['COMPRESS_MIN_SIZE']:
+            return response
+        etag, weak = response.get_etag()
+        cache = app.extensions.get('compressed_pages')
+        key = (etag, encoding)
+        data = cache.get(key) if etag and cache is not None else None
+        if data is None:
+            data = compress(body, encoding, config)
+            if etag and cache is not None:
+                cache.set(key, data)
+        response.set_data(data)
+
+    response.headers['Content-Encoding'] = encoding
+    # The bytes now differ per encoding, so only a weak validator still holds
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    # Pages with an ETag (the dashboards) reuse compressed bytes until their tag changes
+    if app.config['COMPRESS_CACHE_SIZE'] and app.config['FRAGMENT_CACHE_TTL'] > 0:
+        app.extensions['compressed_pages'] = LRUCache(
+            maxsize=app.config['COMPRESS_CACHE_SIZE'], ttl=app.config['FRAGMENT_CACHE_TTL'])
+
+    @app.after_request
+    def compress_after_request(response):
+        return compress_response(response, app)
@@ -0,0 +1,42 @@
+import hashlib
+from flask import current_app, make_response, request
+from app import get_lang
+from app.fragment_cache import ledger_versions
+
+
+# -------------------
+# Conditional GET
+# -------------------
+
+def dashboard_etag(page, owner, sources, fingerprint, *extra):
+    """ETag for one user's dashboard.
+
+    Built from ``ledger_fingerprint(sources)``, the ledger versions of the same
+    tables (trigger-maintained, so in-place edits by any writer count), the
+    page language and any ``extra`` values the page depends on (e.g. today's
+    date for accrued rental).
+    """
+    versions = ledger_versions()
+    state = (
+        page, owner, get_lang(),
+        fingerprint,
+        tuple(versions[model.__tablename__] for model, _, _ in sources),
+        current_app.config.get('ETAG_SALT'),
+        *extra,
+    )
+    return hashlib.sha1(repr(state).encode()).hexdigest()
+
+
+def conditional_response(etag, render):
+    """304 if the client already holds ``etag``; otherwise a 200 from ``render()``."""
+    # The tag describes ledger state rather than exact bytes, so it is sent (and
+    # compared) as a weak validator; it stays valid across response encodings.
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(render())
+    response.set_etag(etag, weak=True)
+    # Always revalidate, and never share one user's page with another
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Cookie')
+    return response
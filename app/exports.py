@@ -0,0 +1,79 @@
+import csv
+import io
+import tempfile
+from itertools import groupby
+from sqlalchemy import select
+from app import db
+
+EXPORT_BATCH = 1000
+
+
+# -------------------
+# Row Cursor
+# -------------------
+
+def ledger_rows(model, owner_column, owner_id, fields):
+    """Rows of one owner's ledger, newest first, fetched EXPORT_BATCH at a time."""
+    query = (select(*(getattr(model, name) for name in fields))
+             .where(owner_column == owner_id)
+             .order_by(model.date.desc(), model.id.desc())
+             .execution_options(yield_per=EXPORT_BATCH))
+    for row in db.session.execute(query):
+        yield tuple(row)
+
+
+def ledger_rows_by_owner(model, owner_column, owner_ids, fields):
+    """(owner_id, rows) for many owners from a single ordered scan, owners ascending."""
+    query = (select(owner_column, *(getattr(model, name) for name in fields))
+             .where(owner_column.in_(list(owner_ids)))
+             .order_by(owner_column, model.date.desc(), model.id.desc())
+             .execution_options(yield_per=EXPORT_BATCH))
+    rows = db.session.execute(query)
+    for owner_id, group in groupby(rows, key=lambda row: row[0]):
+        yield owner_id, [tuple(row[1:]) for row in group]
+
+
+# -------------------
+# Writers
+# -------------------
+
+def csv_chunks(fields, rows):
+    """CSV text in roughly EXPORT_BATCH-row chunks (BOM first so Excel reads it as UTF-8)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(fields)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % EXPORT_BATCH == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def xlsx_file(title, fields, rows):
+    """Spooled temp file holding the workbook, rewound and ready to send.
+
+    openpyxl's write-only mode streams each row to disk as it is appended,
+    so only the current row is ever held in memory.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title[:31])
+    header = []
+    for name in fields:
+        cell = WriteOnlyCell(sheet, value=name)
+        cell.font = Font(bold=True)
+        header.append(cell)
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+
+    output = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    workbook.save(output)
+    output.seek(0)
+    return output
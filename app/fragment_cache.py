@@ -0,0 +1,248 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from markupsafe import Markup
+from sqlalchemy import event, inspect, insert, select, text, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Purchase, Payment, StockData, StockExit, LoanData, MarginData, LedgerVersion
+
+VERSIONED_MODELS = (Purchase, Payment, StockData, StockExit, LoanData, MarginData)
+
+_DIRTY_KEY = 'ledger_version_dirty'
+
+
+# -------------------
+# Ledger Versions
+# -------------------
+
+_version_table_ready = False
+
+
+def _ensure_version_table(connection):
+    global _version_table_ready
+    if not _version_table_ready:
+        LedgerVersion.__table__.create(connection, checkfirst=True)
+        if connection.dialect.name == 'sqlite':
+            existing = set(inspect(connection).get_table_names())
+            models = [m for m in VERSIONED_MODELS if m.__tablename__ in existing]
+            if models:
+                install_version_triggers(connection, models)
+        _version_table_ready = True
+
+
+def install_version_triggers(connection, models=None):
+    """SQLite triggers bumping a ledger's version on every row written, by any writer.
+
+    The ORM listeners below only see this process; an in-place edit from the
+    admin app would otherwise leave versions, fragments and ETags unchanged.
+    Idempotent; ledger_version only has to exist by the time a row is written.
+    """
+    for model in models or VERSIONED_MODELS:
+        table = model.__tablename__
+        for op in ('INSERT', 'UPDATE', 'DELETE'):
+            connection.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{op.lower()} AFTER {op} ON {table} BEGIN "
+                f"INSERT INTO ledger_version (table_name, version) VALUES ('{table}', 1) "
+                f"ON CONFLICT (table_name) DO UPDATE SET version = version + 1; END"))
+
+
+def _create_version_triggers(table, connection, **kw):
+    # create_all() / Table.create(): install once both a ledger table and ledger_version exist
+    if connection.dialect.name != 'sqlite':
+        return
+    existing = set(inspect(connection).get_table_names())
+    if table is LedgerVersion.__table__:
+        models = [m for m in VERSIONED_MODELS if m.__tablename__ in existing]
+    elif LedgerVersion.__tablename__ in existing:
+        models = [m for m in VERSIONED_MODELS if m.__table__ is table]
+    else:
+        return
+    if models:
+        install_version_triggers(connection, models)
+
+
+def ledger_versions():
+    """{table_name: version} for every versioned ledger (one query)."""
+    connection = db.session.connection()
+    _ensure_version_table(connection)
+    versions = dict(connection.execute(select(LedgerVersion.table_name, LedgerVersion.version)).all())
+    return {model.__tablename__: versions.get(model.__tablename__, 0) for model in VERSIONED_MODELS}
+
+
+def bump_versions(connection, table_names):
+    _ensure_version_table(connection)
+    table = LedgerVersion.__table__
+    for name in table_names:
+        bumped = connection.execute(
+            update(table).where(table.c.table_name == name).values(version=table.c.version + 1)
+        ).rowcount
+        if not bumped:
+            connection.execute(insert(table).values(table_name=name, version=1))
+
+
+def _mark_dirty(mapper, connection, target):
+    connection.info.setdefault(_DIRTY_KEY, set()).add(mapper.local_table.name)
+
+
+def _bump_dirty(session, flush_context):
+    connection = session.connection()
+    dirty = connection.info.pop(_DIRTY_KEY, None)
+    if dirty:
+        _ensure_version_table(connection)
+        if connection.dialect.name != 'sqlite':  # on SQLite the version triggers counted these rows
+            bump_versions(connection, sorted(dirty))
+
+
+def register_listeners():
+    for model in VERSIONED_MODELS:
+        for name in ('after_insert', 'after_update', 'after_delete'):
+            if not event.contains(model, name, _mark_dirty):
+                event.listen(model, name, _mark_dirty)
+    if not event.contains(Session, 'after_flush', _bump_dirty):
+        event.listen(Session, 'after_flush', _bump_dirty)
+    for table in (LedgerVersion.__table__, *(model.__table__ for model in VERSIONED_MODELS)):
+        if not event.contains(table, 'after_create', _create_version_triggers):
+            event.listen(table, 'after_create', _create_version_triggers)
+
+
+# -------------------
+# Cache Backends
+# -------------------
+
+class LRUCache:
+    """In-process LRU with a per-entry TTL."""
+
+    def __init__(self, maxsize=512, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache:
+    """Shared on-disk fragment store so every worker process can reuse a render."""
+
+    def __init__(self, path, ttl=300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fragments (key TEXT PRIMARY KEY, expires REAL NOT NULL, html TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT html FROM fragments WHERE key = ? AND expires >= ?", (repr(key), time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fragments (key, expires, html) VALUES (?, ?, ?)",
+                (repr(key), time.time() + self.ttl, value),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM fragments")
+            self._conn.commit()
+
+
+# -------------------
+# Fragment Cache
+# -------------------
+
+class FragmentCache:
+    """Memory first, then the optional shared backend; renders and stores on a miss."""
+
+    def __init__(self, memory, backend=None):
+        self.memory = memory
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key, render):
+        html = self.memory.get(key)
+        if html is None and self.backend is not None:
+            html = self.backend.get(key)
+            if html is not None:
+                self.memory.set(key, html)
+        if html is not None:
+            self.hits += 1
+            return Markup(html)
+
+        self.misses += 1
+        html = str(render())
+        self.memory.set(key, html)
+        if self.backend is not None:
+            self.backend.set(key, html)
+        return Markup(html)
+
+
+def init_fragment_cache(app):
+    ttl = app.config['FRAGMENT_CACHE_TTL']
+    path = app.config.get('FRAGMENT_CACHE_PATH')
+    app.extensions['fragment_cache'] = FragmentCache(
+        LRUCache(maxsize=app.config['FRAGMENT_CACHE_SIZE'], ttl=ttl),
+        SQLiteCache(path, ttl=ttl) if path else None,
+    )
+    register_listeners()
+
+
+class Sections:
+    """Per-request view of the fragment cache for one seller/stockist page.
+
+    ``render(name, tables, fn, *extra)`` returns cached HTML for a section whose
+    key is (name, owner, language, versions of ``tables``, *extra); ``fn`` only
+    runs on a miss, so a hit skips the section's queries as well as its template.
+    """
+
+    def __init__(self, cache, owner, lang):
+        self.cache = cache
+        self.owner = owner
+        self.lang = lang
+        self._versions = None
+
+    def render(self, name, tables, fn, *extra):
+        if self.cache is None or self.cache.memory.ttl <= 0:
+            return Markup(fn())
+        if self._versions is None:
+            self._versions = ledger_versions()
+        key = (name, self.owner, self.lang, tuple(self._versions[t] for t in tables), *extra)
+        return self.cache.get_or_render(key, fn)
@@ -0,0 +1,117 @@
+import time
+from collections import namedtuple
+from flask import current_app, g, has_app_context, session
+from sqlalchemy import event, inspect, literal, select, union_all
+from sqlalchemy.orm import Session, object_session
+from app import db
+from app.models import Seller, Stockist
+from app.fragment_cache import LRUCache
+
+Identity = namedtuple('Identity', 'seller_id seller_name stockist_id stockist_name')
+NO_IDENTITY = Identity(None, None, None, None)
+
+_PENDING_KEY = 'identity_pending_mobiles'
+
+
+# -------------------
+# Resolution
+# -------------------
+
+def resolve_identity(mobile):
+    """Seller and stockist behind a mobile number, from one query."""
+    rows = db.session.execute(union_all(
+        select(literal('seller'), Seller.id, Seller.name).where(Seller.mobile == mobile),
+        select(literal('stockist'), Stockist.id, Stockist.name).where(Stockist.mobile == mobile),
+    )).all()
+    found = {role: (party_id, name) for role, party_id, name in rows}
+    seller_id, seller_name = found.get('seller', (None, None))
+    stockist_id, stockist_name = found.get('stockist', (None, None))
+    return Identity(seller_id, seller_name, stockist_id, stockist_name)
+
+
+class IdentityCache:
+    """Process-wide mobile -> Identity cache, plus when each mobile was last edited."""
+
+    def __init__(self, ttl, maxsize=4096):
+        self.ttl = ttl
+        self.entries = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.edited = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, mobile):
+        identity = self.entries.get(mobile)
+        if identity is None:
+            identity = resolve_identity(mobile)
+            self.entries.set(mobile, identity)
+        return identity
+
+    def invalidate(self, mobiles):
+        now = time.time()
+        for mobile in mobiles:
+            self.entries.delete(mobile)
+            self.edited.set(mobile, now)
+
+
+# -------------------
+# Per-session Identity
+# -------------------
+
+def remember_identity(mobile):
+    """Resolve ``mobile`` now and keep the result in the signed session cookie."""
+    identity = current_app.extensions['identity_cache'].get(mobile)
+    session['identity'] = {'mobile': mobile, 'at': time.time(), **identity._asdict()}
+    g.identity = identity
+    return identity
+
+
+def current_identity():
+    """Identity of the logged-in mobile; no query while the session copy is fresh."""
+    if 'identity' in g:
+        return g.identity
+    mobile = session.get('mobile')
+    if not mobile:
+        return NO_IDENTITY
+
+    cache = current_app.extensions['identity_cache']
+    stored = session.get('identity')
+    if (stored and stored.get('mobile') == mobile
+            and time.time() - stored['at'] < cache.ttl
+            and stored['at'] > (cache.edited.get(mobile) or 0)):
+        g.identity = Identity(*(stored[field] for field in Identity._fields))
+        return g.identity
+    return remember_identity(mobile)
+
+
+# -------------------
+# Profile Edits
+# -------------------
+
+def _mark_edited(mapper, connection, target):
+    db_session = object_session(target)
+    if db_session is None:
+        return
+    mobiles = db_session.info.setdefault(_PENDING_KEY, set())
+    mobiles.add(target.mobile)
+    # A changed mobile also retires the identity of the number it used to be
+    mobiles.update(inspect(target).attrs.mobile.history.deleted or ())
+
+
+def _invalidate_committed(db_session):
+    mobiles = db_session.info.pop(_PENDING_KEY, None)
+    if mobiles and has_app_context() and 'identity_cache' in current_app.extensions:
+        current_app.extensions['identity_cache'].invalidate(m for m in mobiles if m)
+
+
+def _discard_pending(db_session):
+    db_session.info.pop(_PENDING_KEY, None)
+
+
+def init_identity(app):
+    # Other workers only see an edit once their copy expires, so keep the TTL short.
+    app.extensions['identity_cache'] = IdentityCache(app.config['IDENTITY_TTL'])
+    for model in (Seller, Stockist):
+        for name in ('after_insert', 'after_update', 'after_delete'):
+            if not event.contains(model, name, _mark_edited):
+                event.listen(model, name, _mark_edited)
+    if not event.contains(Session, 'after_commit', _invalidate_committed):
+        event.listen(Session, 'after_commit', _invalidate_committed)
+        event.listen(Session, 'after_rollback', _discard_pending)
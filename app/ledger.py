@@ -0,0 +1,279 @@
+from sqlalchemy import func, literal, select, union, union_all
+from app import db
+from app.models import StockData, StockExit, LoanData, MarginData, Purchase, Payment
+
+
+# -------------------
+# Stock Positions
+# -------------------
+
+def stock_positions(stockist_ids=None):
+    """Total in / total out / first in-date for every (stockist_id, warehouse, commodity).
+
+    StockData and StockExit are folded into one UNION ALL and grouped once, so the
+    cost is a single query no matter how many pairs a stockist holds.
+    Pass ``stockist_ids`` (an iterable) to restrict the scan; ``None`` means all.
+    """
+    stock_in = select(
+        StockData.stockist_id.label('stockist_id'),
+        StockData.warehouse.label('warehouse'),
+        StockData.commodity.label('commodity'),
+        func.coalesce(StockData.quantity, 0).label('qty_in'),
+        literal(0.0).label('qty_out'),
+        StockData.date.label('in_date'),
+    )
+    stock_out = select(
+        StockExit.stockist_id,
+        StockExit.warehouse,
+        StockExit.commodity,
+        literal(0.0),
+        func.coalesce(StockExit.quantity, 0),
+        literal(None, type_=db.Date),
+    )
+    if stockist_ids is not None:
+        ids = list(stockist_ids)
+        stock_in = stock_in.where(StockData.stockist_id.in_(ids))
+        stock_out = stock_out.where(StockExit.stockist_id.in_(ids))
+
+    movements = union_all(stock_in, stock_out).subquery()
+    rows = db.session.execute(
+        select(
+            movements.c.stockist_id,
+            movements.c.warehouse,
+            movements.c.commodity,
+            func.sum(movements.c.qty_in),
+            func.sum(movements.c.qty_out),
+            func.min(movements.c.in_date),
+        )
+        .group_by(movements.c.stockist_id, movements.c.warehouse, movements.c.commodity)
+        # Only pairs that were actually stocked in (exits alone carry no rental)
+        .having(func.min(movements.c.in_date).isnot(None))
+        .order_by(movements.c.stockist_id, movements.c.warehouse, movements.c.commodity)
+    ).all()
+
+    return {
+        (stockist, wh, com): (total_in or 0, total_out or 0, first_date)
+        for stockist, wh, com, total_in, total_out, first_date in rows
+    }
+
+
+# -------------------
+# Row Summaries
+# -------------------
+
+def material_summary_from(stock_data):
+    # Summary by warehouse and commodity (in MT)
+    material_summary = {}
+    for entry in stock_data:
+        wh = entry.warehouse
+        com = entry.commodity
+        qty = (entry.quantity or 0) / 1000  # Convert kg to MT
+
+        if wh not in material_summary:
+            material_summary[wh] = {}
+        material_summary[wh][com] = material_summary[wh].get(com, 0) + qty
+    return material_summary
+
+
+def loan_summary_from(loan_data):
+    loan_summary = {}
+    for entry in loan_data:
+        wh = entry.warehouse
+        loan_type = entry.loan_type
+        amt = entry.amount or 0
+
+        if wh not in loan_summary:
+            loan_summary[wh] = {'cash': 0, 'margin': 0}
+
+        if loan_type and loan_type.lower() == 'cash':
+            loan_summary[wh]['cash'] += amt
+        elif loan_type and loan_type.lower() == 'margin':
+            loan_summary[wh]['margin'] += amt
+    return loan_summary
+
+
+def margin_summary_from(margin_data):
+    margin_summary = {}
+    for entry in margin_data:
+        wh = entry.warehouse
+        amt = entry.amount or 0
+
+        if wh not in margin_summary:
+            margin_summary[wh] = 0
+        margin_summary[wh] += amt
+    return margin_summary
+
+
+# -------------------
+# Rental Due
+# -------------------
+
+RENTAL_RATE = 3.334     # ₹ per MT per day
+INTEREST_RATE = 13.75   # % per annum on loans net of margin paid
+
+
+def rental_due_from_positions(positions, rental_rate, today):
+    # positions: {(warehouse, commodity): (total_in_kg, total_out_kg, first_in_date)}
+    rental_due = {}
+    for (wh, commodity), (total_in, total_out, first_date) in positions.items():
+        net_qty_mt = (total_in - total_out) / 1000
+
+        # Rental = net_qty_mt * rental_rate * number of days since earliest entry
+        num_days = (today - first_date).days + 1 if first_date else 0
+
+        total_rental = net_qty_mt * rental_rate * num_days if net_qty_mt > 0 else 0
+        rental_due.setdefault(wh, {})[commodity] = round(total_rental, 2)
+    return rental_due
+
+
+def rental_due_for(stockist_id, rental_rate, today):
+    positions = {
+        (wh, com): totals
+        for (_, wh, com), totals in stock_positions([stockist_id]).items()
+    }
+    return rental_due_from_positions(positions, rental_rate, today)
+
+
+# -------------------
+# Loan Positions
+# -------------------
+
+def loan_positions(stockist_ids=None):
+    """Total loan / total margin paid / first loan date for every (stockist_id, warehouse).
+
+    Same shape as stock_positions(): LoanData and MarginData are folded into one
+    UNION ALL and grouped once, so interest costs one query per request.
+    """
+    loans = select(
+        LoanData.stockist_id.label('stockist_id'),
+        LoanData.warehouse.label('warehouse'),
+        func.coalesce(LoanData.amount, 0).label('loan'),
+        literal(0.0).label('margin'),
+        LoanData.date.label('loan_date'),
+    )
+    margins = select(
+        MarginData.stockist_id,
+        MarginData.warehouse,
+        literal(0.0),
+        func.coalesce(MarginData.amount, 0),
+        literal(None, type_=db.Date),
+    )
+    if stockist_ids is not None:
+        ids = list(stockist_ids)
+        loans = loans.where(LoanData.stockist_id.in_(ids))
+        margins = margins.where(MarginData.stockist_id.in_(ids))
+
+    movements = union_all(loans, margins).subquery()
+    rows = db.session.execute(
+        select(
+            movements.c.stockist_id,
+            movements.c.warehouse,
+            func.sum(movements.c.loan),
+            func.sum(movements.c.margin),
+            func.min(movements.c.loan_date),
+        )
+        .group_by(movements.c.stockist_id, movements.c.warehouse)
+        # Interest only accrues on warehouses where a loan was actually taken
+        .having(func.min(movements.c.loan_date).isnot(None))
+        .order_by(movements.c.stockist_id, movements.c.warehouse)
+    ).all()
+
+    return {
+        (stockist, wh): (total_loan or 0, total_margin or 0, first_date)
+        for stockist, wh, total_loan, total_margin, first_date in rows
+    }
+
+
+# -------------------
+# Interest Due
+# -------------------
+
+def interest_due_from_positions(positions, interest_rate, today):
+    # positions: {warehouse: (total_loan, total_margin, first_loan_date)}
+    interest_due = {}
+    for wh, (total_loan, total_margin, first_date) in positions.items():
+        num_days = (today - first_date).days + 1 if first_date else 0
+
+        principal = total_loan - total_margin
+        interest_amt = principal * (interest_rate / 100) * (num_days / 365) if principal > 0 and num_days > 0 else 0
+        interest_due[wh] = round(interest_amt, 2)
+    return interest_due
+
+
+def interest_due_for(stockist_id, interest_rate, today):
+    positions = {
+        wh: totals
+        for (_, wh), totals in loan_positions([stockist_id]).items()
+    }
+    return interest_due_from_positions(positions, interest_rate, today)
+
+
+# -------------------
+# Seller Balances
+# -------------------
+
+PURCHASE_TOTAL_FIELDS = ('quantity', 'reduction', 'net_qty', 'cost', 'handling', 'net_cost')
+
+
+def purchase_totals(seller_ids=None):
+    """{seller_id: {quantity, reduction, net_qty, cost, handling, net_cost}} in one query."""
+    columns = [getattr(Purchase, field) for field in PURCHASE_TOTAL_FIELDS]
+    query = select(
+        Purchase.seller_id,
+        *(func.sum(func.coalesce(col, 0)) for col in columns),
+    ).group_by(Purchase.seller_id)
+    if seller_ids is not None:
+        query = query.where(Purchase.seller_id.in_(list(seller_ids)))
+
+    return {
+        row[0]: dict(zip(PURCHASE_TOTAL_FIELDS, row[1:]))
+        for row in db.session.execute(query)
+    }
+
+
+def payment_totals(seller_ids=None):
+    """{seller_id: total amount_paid} in one query."""
+    query = select(
+        Payment.seller_id,
+        func.sum(func.coalesce(Payment.amount_paid, 0)),
+    ).group_by(Payment.seller_id)
+    if seller_ids is not None:
+        query = query.where(Payment.seller_id.in_(list(seller_ids)))
+
+    return dict(db.session.execute(query).all())
+
+
+def seller_balance(seller_id):
+    """Purchase summary, payment summary and payment due for one seller (two queries)."""
+    purchase_summary = purchase_totals([seller_id]).get(seller_id) or dict.fromkeys(PURCHASE_TOTAL_FIELDS, 0)
+    payment_summary = {'amount': payment_totals([seller_id]).get(seller_id, 0)}
+    payment_due = purchase_summary['net_cost'] - payment_summary['amount']
+    return purchase_summary, payment_summary, payment_due
+
+
+# -------------------
+# Ledger Fingerprints
+# -------------------
+
+def ledger_fingerprint(sources):
+    """(row count, max id) of each ``(model, owner_column, owner_id)`` ledger, in one query.
+
+    Appends and deletes always move one of the two. In-place edits move neither;
+    those are caught by the ledger versions, which SQLite triggers bump for
+    every writer (see app/fragment_cache.py).
+    """
+    columns = []
+    for model, owner_column, owner in sources:
+        columns.append(select(func.count()).where(owner_column == owner).scalar_subquery())
+        columns.append(select(func.max(model.id)).where(owner_column == owner).scalar_subquery())
+    row = db.session.execute(select(*columns)).one()
+    return tuple(zip(row[::2], row[1::2]))
+
+
+def stockist_display_values(stockist_id):
+    """Distinct warehouse, commodity and loan type names in a stockist's histories (one query)."""
+    parts = [select(LoanData.loan_type).where(LoanData.stockist_id == stockist_id)]
+    for model in (StockData, LoanData, MarginData):
+        for column in (model.warehouse, model.commodity):
+            parts.append(select(column).where(model.stockist_id == stockist_id))
+    return [value for (value,) in db.session.execute(union(*parts)) if value]
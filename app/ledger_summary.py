@@ -0,0 +1,264 @@
+from sqlalchemy import case, delete, event, func, inspect, insert, literal, select, union_all
+from sqlalchemy.orm import Session
+from app import db
+from app.models import StockData, StockExit, LoanData, MarginData, StockistLedgerSummary
+from app.ledger import rental_due_from_positions, interest_due_from_positions
+
+SUMMARY_FIELDS = (
+    'total_in', 'total_out', 'first_in_date', 'stock_in_count',
+    'total_loan', 'total_loan_cash', 'total_loan_margin', 'first_loan_date', 'loan_count',
+    'total_margin_paid', 'margin_count',
+)
+
+_DIRTY_KEY = 'ledger_summary_dirty'
+
+
+# -------------------
+# Source Aggregation
+# -------------------
+
+def _movements(stockist_ids=None):
+    # One row shape for all four ledgers; each source only fills its own columns.
+    zero, none_date = literal(0.0), literal(None, type_=db.Date)
+
+    def _row(model, commodity, **cols):
+        values = {
+            'qty_in': zero, 'in_date': none_date, 'in_n': literal(0),
+            'qty_out': zero,
+            'loan': zero, 'loan_cash': zero, 'loan_margin': zero, 'loan_date': none_date, 'loan_n': literal(0),
+            'margin': zero, 'margin_n': literal(0),
+        }
+        values.update(cols)
+        query = select(
+            model.stockist_id.label('stockist_id'),
+            model.warehouse.label('warehouse'),
+            commodity.label('commodity'),
+            *(value.label(key) for key, value in values.items()),
+        )
+        if stockist_ids is not None:
+            query = query.where(model.stockist_id.in_(list(stockist_ids)))
+        else:
+            # Rows whose name matches no stockist have nowhere to be summarized
+            query = query.where(model.stockist_id.isnot(None))
+        return query
+
+    loan_amount = func.coalesce(LoanData.amount, 0)
+    loan_type = func.lower(LoanData.loan_type)
+    return union_all(
+        _row(StockData, StockData.commodity,
+             qty_in=func.coalesce(StockData.quantity, 0), in_date=StockData.date, in_n=literal(1)),
+        _row(StockExit, StockExit.commodity,
+             qty_out=func.coalesce(StockExit.quantity, 0)),
+        _row(LoanData, LoanData.commodity,
+             loan=loan_amount,
+             loan_cash=case((loan_type == 'cash', loan_amount), else_=0.0),
+             loan_margin=case((loan_type == 'margin', loan_amount), else_=0.0),
+             loan_date=LoanData.date, loan_n=literal(1)),
+        _row(MarginData, MarginData.commodity,
+             margin=func.coalesce(MarginData.amount, 0), margin_n=literal(1)),
+    ).subquery()
+
+
+def compute_summaries(connection, stockist_ids=None):
+    """{(stockist_id, warehouse, commodity): {field: value}} straight from the ledgers (one query)."""
+    m = _movements(stockist_ids)
+    rows = connection.execute(
+        select(
+            m.c.stockist_id, m.c.warehouse, m.c.commodity,
+            func.sum(m.c.qty_in), func.sum(m.c.qty_out), func.min(m.c.in_date), func.sum(m.c.in_n),
+            func.sum(m.c.loan), func.sum(m.c.loan_cash), func.sum(m.c.loan_margin),
+            func.min(m.c.loan_date), func.sum(m.c.loan_n),
+            func.sum(m.c.margin), func.sum(m.c.margin_n),
+        ).group_by(m.c.stockist_id, m.c.warehouse, m.c.commodity)
+    ).all()
+
+    summaries = {}
+    for (stockist_id, wh, com, total_in, total_out, first_in, in_n,
+         loan, loan_cash, loan_margin, first_loan, loan_n, margin, margin_n) in rows:
+        summaries[(stockist_id, wh, com)] = {
+            'total_in': total_in or 0, 'total_out': total_out or 0,
+            'first_in_date': first_in, 'stock_in_count': in_n or 0,
+            'total_loan': loan or 0, 'total_loan_cash': loan_cash or 0,
+            'total_loan_margin': loan_margin or 0,
+            'first_loan_date': first_loan, 'loan_count': loan_n or 0,
+            'total_margin_paid': margin or 0, 'margin_count': margin_n or 0,
+        }
+    return summaries
+
+
+# -------------------
+# Refresh / Rebuild
+# -------------------
+
+def refresh_stockists(connection, stockist_ids):
+    # Replace every summary row for these stockists with freshly aggregated totals.
+    stockist_ids = list(stockist_ids)
+    if not stockist_ids:
+        return
+    table = StockistLedgerSummary.__table__
+    summaries = compute_summaries(connection, stockist_ids)
+    connection.execute(delete(table).where(table.c.stockist_id.in_(stockist_ids)))
+    if summaries:
+        connection.execute(insert(table), [
+            {'stockist_id': stockist_id, 'warehouse': wh, 'commodity': com, **values}
+            for (stockist_id, wh, com), values in summaries.items()
+        ])
+
+
+def rebuild_summaries():
+    """Recreate the whole summary table from the ledgers; returns the row count."""
+    table = StockistLedgerSummary.__table__
+    with db.engine.begin() as connection:
+        table.create(connection, checkfirst=True)
+        summaries = compute_summaries(connection)
+        connection.execute(delete(table))
+        if summaries:
+            connection.execute(insert(table), [
+                {'stockist_id': stockist_id, 'warehouse': wh, 'commodity': com, **values}
+                for (stockist_id, wh, com), values in summaries.items()
+            ])
+    return len(summaries)
+
+
+def check_summaries(stockist_ids=None):
+    """Keys whose stored summary differs from the ledgers: [(key, stored, expected)]."""
+    expected = compute_summaries(db.session.connection(), stockist_ids)
+    query = StockistLedgerSummary.query
+    if stockist_ids is not None:
+        query = query.filter(StockistLedgerSummary.stockist_id.in_(list(stockist_ids)))
+    stored = {
+        (row.stockist_id, row.warehouse, row.commodity): {f: getattr(row, f) for f in SUMMARY_FIELDS}
+        for row in query.all()
+    }
+
+    mismatches = []
+    for key in sorted(set(expected) | set(stored), key=lambda k: tuple(str(part) for part in k)):
+        have, want = stored.get(key), expected.get(key)
+        if have is None or want is None or any(
+            _differs(have[f], want[f]) for f in SUMMARY_FIELDS
+        ):
+            mismatches.append((key, have, want))
+    return mismatches
+
+
+def _differs(a, b):
+    if isinstance(a, float) or isinstance(b, float):
+        return abs((a or 0) - (b or 0)) > 1e-6
+    return a != b
+
+
+# -------------------
+# Incremental Upkeep
+# -------------------
+
+def _mark_dirty(mapper, connection, target):
+    dirty = connection.info.setdefault(_DIRTY_KEY, set())
+    if target.stockist_id is not None:
+        dirty.add(target.stockist_id)
+    # A reassigned row also changes the stockist it used to belong to
+    history = inspect(target).attrs.stockist_id.history
+    dirty.update(stockist_id for stockist_id in history.deleted or () if stockist_id is not None)
+
+
+_summary_table_ready = False
+
+
+def _ensure_summary_table(connection):
+    # Checked (and created if missing) once per process, not on every flush
+    global _summary_table_ready
+    if not _summary_table_ready:
+        StockistLedgerSummary.__table__.create(connection, checkfirst=True)
+        _summary_table_ready = True
+        # The CREATE is part of the caller's transaction; if that rolls back, so does the table
+        event.listen(connection, 'rollback', forget_summary_table, once=True)
+
+
+def forget_summary_table(*args):
+    """Make the next flush re-check the summary table (after it was dropped or rolled back)."""
+    global _summary_table_ready
+    _summary_table_ready = False
+
+
+def _refresh_dirty(session, flush_context):
+    connection = session.connection()
+    dirty = connection.info.pop(_DIRTY_KEY, None)
+    if dirty:
+        _ensure_summary_table(connection)
+        refresh_stockists(connection, dirty)
+
+
+def register_listeners():
+    for model in (StockData, StockExit, LoanData, MarginData):
+        for name in ('after_insert', 'after_update', 'after_delete'):
+            if not event.contains(model, name, _mark_dirty):
+                event.listen(model, name, _mark_dirty)
+    if not event.contains(Session, 'after_flush', _refresh_dirty):
+        event.listen(Session, 'after_flush', _refresh_dirty)
+
+
+# -------------------
+# Dashboard Lookup
+# -------------------
+
+def summary_rows(stockist_ids, live=False):
+    """{stockist_id: [StockistLedgerSummary]} ordered by warehouse, commodity (one query).
+
+    ``live=True`` aggregates straight from the ledgers into transient rows,
+    for when the materialized table is not in use.
+    """
+    by_stockist = {stockist_id: [] for stockist_id in stockist_ids}
+    if live:
+        summaries = compute_summaries(db.session.connection(), list(by_stockist))
+        for (stockist_id, wh, com), values in sorted(
+                summaries.items(), key=lambda item: (item[0][0], str(item[0][1]), str(item[0][2]))):
+            by_stockist[stockist_id].append(
+                StockistLedgerSummary(stockist_id=stockist_id, warehouse=wh, commodity=com, **values))
+    else:
+        rows = (StockistLedgerSummary.query
+                .filter(StockistLedgerSummary.stockist_id.in_(list(by_stockist)))
+                .order_by(StockistLedgerSummary.stockist_id,
+                          StockistLedgerSummary.warehouse, StockistLedgerSummary.commodity))
+        for row in rows:
+            by_stockist[row.stockist_id].append(row)
+    return by_stockist
+
+
+def stockist_dashboard(stockist_id, rental_rate, interest_rate, today, live=False):
+    """Material, loan, margin, rental and interest summaries from one indexed lookup."""
+    rows = summary_rows([stockist_id], live)[stockist_id]
+    return dashboard_from_rows(rows, rental_rate, interest_rate, today)
+
+
+def dashboard_from_rows(rows, rental_rate, interest_rate, today):
+    """stockist_dashboard() for summary rows already loaded (e.g. by a bulk run)."""
+    material_summary, loan_summary, margin_summary = {}, {}, {}
+    stock_positions, loan_positions = {}, {}
+    for row in rows:
+        wh, com = row.warehouse, row.commodity
+        if row.stock_in_count:
+            material_summary.setdefault(wh, {})[com] = row.total_in / 1000
+            stock_positions[(wh, com)] = (row.total_in, row.total_out, row.first_in_date)
+        if row.loan_count:
+            loans = loan_summary.setdefault(wh, {'cash': 0, 'margin': 0})
+            loans['cash'] += row.total_loan_cash
+            loans['margin'] += row.total_loan_margin
+        if row.margin_count:
+            margin_summary[wh] = margin_summary.get(wh, 0) + row.total_margin_paid
+
+    # Interest is per warehouse: all loans against all margins paid there
+    for row in rows:
+        if row.warehouse not in loan_summary:
+            continue
+        total_loan, total_margin, first_date = loan_positions.get(row.warehouse, (0, 0, None))
+        if row.first_loan_date and (first_date is None or row.first_loan_date < first_date):
+            first_date = row.first_loan_date
+        loan_positions[row.warehouse] = (
+            total_loan + row.total_loan, total_margin + row.total_margin_paid, first_date)
+
+    return (
+        material_summary,
+        loan_summary,
+        margin_summary,
+        rental_due_from_positions(stock_positions, rental_rate, today),
+        interest_due_from_positions(loan_positions, interest_rate, today),
+    )
@@ -0,0 +1,185 @@
+from datetime import date, datetime
+from sqlalchemy import event, text
+from app import db
+
+# Formats seen in legacy Purchase.date strings, most common first
+LEGACY_DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M:%S.%f",
+    "%Y-%m-%dT%H:%M:%S",
+    "%d-%m-%Y",
+    "%d/%m/%Y",
+    "%Y/%m/%d",
+)
+
+
+def parse_legacy_date(value):
+    """date for any legacy representation; None for blanks; ValueError if unrecognised."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = str(value).strip()
+    if not value:
+        return None
+    for fmt in LEGACY_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised date {value!r}")
+
+
+# -------------------
+# Purchase.date -> DATE
+# -------------------
+
+def iso_date_sql(column):
+    """SQL rewriting the zero-padded LEGACY_DATE_FORMATS in ``column`` to 'YYYY-MM-DD'.
+
+    NULL for blanks and anything else. The result may still be an impossible
+    date (e.g. 2024-02-31): date(x, '+0 days') normalizes those, so it differs.
+    """
+    y, d = '[0-9]' * 4, '[0-9]' * 2
+    return (
+        f"CASE WHEN trim({column}) = '' THEN NULL "
+        f"WHEN {column} GLOB '{y}-{d}-{d}' THEN {column} "
+        f"WHEN {column} GLOB '{y}-{d}-{d}[ T]*' THEN substr({column}, 1, 10) "
+        f"WHEN {column} GLOB '{y}/{d}/{d}' THEN replace({column}, '/', '-') "
+        f"WHEN {column} GLOB '{d}[-/]{d}[-/]{y}' "
+        f"THEN substr({column}, 7, 4) || '-' || substr({column}, 4, 2) || '-' || substr({column}, 1, 2) "
+        f"END"
+    )
+
+
+def install_date_triggers(connection):
+    """SQLite triggers keeping purchase.date ISO for writers outside this app (the admin app).
+
+    SQLite does not enforce the DATE column type, and a non-ISO string would make
+    every read of the row fail. Legacy formats are rewritten to ISO after the
+    write; values that are not a date at all are rejected. Idempotent.
+    """
+    iso = iso_date_sql('NEW.date')
+    for op, when in (('INSERT', 'INSERT'), ('UPDATE', 'UPDATE OF date')):
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS trg_purchase_date_{op.lower()}_check BEFORE {when} ON purchase "
+            f"WHEN NEW.date IS NOT NULL AND trim(NEW.date) != '' AND ({iso} IS NULL OR date({iso}, '+0 days') IS NOT {iso}) BEGIN "
+            f"SELECT RAISE(ABORT, 'purchase.date must be a date (YYYY-MM-DD)'); END"))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS trg_purchase_date_{op.lower()}_iso AFTER {when} ON purchase "
+            f"WHEN NEW.date IS NOT {iso} BEGIN "
+            f"UPDATE purchase SET date = {iso} WHERE id = NEW.id; END"))
+
+
+def _create_date_triggers(table, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        install_date_triggers(connection)
+
+
+def register_listeners():
+    from app.models import Purchase
+    if not event.contains(Purchase.__table__, 'after_create', _create_date_triggers):
+        event.listen(Purchase.__table__, 'after_create', _create_date_triggers)
+
+
+def migrate_purchase_dates():
+    """Rewrite purchase.date as ISO dates in a DATE column; returns rows converted.
+
+    Raises ValueError (and changes nothing) if any value cannot be parsed.
+    """
+    from app.models import Purchase
+    from app.party_keys import install_party_triggers
+
+    table = Purchase.__table__
+    with db.engine.begin() as conn:
+        rows = conn.execute(text("SELECT id, date FROM purchase")).all()
+
+        converted, bad = [], []
+        for row_id, raw in rows:
+            try:
+                parsed = parse_legacy_date(raw)
+            except ValueError:
+                bad.append((row_id, raw))
+                continue
+            iso = parsed.isoformat() if parsed else None
+            if iso != raw:
+                converted.append({'id': row_id, 'date': iso})
+        if bad:
+            raise ValueError(f"{len(bad)} purchase date(s) could not be parsed: {bad[:10]}")
+
+        if converted:
+            conn.execute(text("UPDATE purchase SET date = :date WHERE id = :id"), converted)
+
+        # SQLite cannot ALTER a column type: rebuild the table if it is still VARCHAR
+        column_type = next(
+            c['type'] for c in db.inspect(conn).get_columns('purchase') if c['name'] == 'date'
+        )
+        if not isinstance(column_type, db.Date):
+            conn.execute(text("ALTER TABLE purchase RENAME TO purchase_legacy"))
+            # Only columns both tables have: seller_id may not exist yet (migrate-party-ids adds it)
+            legacy = {c['name'] for c in db.inspect(conn).get_columns('purchase_legacy')}
+            columns = ", ".join(c.name for c in table.columns if c.name in legacy)
+            for ix in db.inspect(conn).get_indexes('purchase_legacy'):
+                if ix['name'] and not ix['name'].startswith('sqlite_'):
+                    conn.execute(text(f'DROP INDEX "{ix["name"]}"'))
+            table.create(conn)
+            conn.execute(text(f"INSERT INTO purchase ({columns}) SELECT {columns} FROM purchase_legacy"))
+            conn.execute(text("DROP TABLE purchase_legacy"))
+            # Dropping purchase_legacy took its seller_id triggers with it
+            install_party_triggers(conn, [Purchase])
+        install_date_triggers(conn)
+
+    return len(converted)
+
+
+# -------------------
+# Party name -> integer keys
+# -------------------
+
+def migrate_party_ids():
+    """Add and backfill seller_id / stockist_id on every ledger table.
+
+    Also installs SQLite triggers so rows inserted (or renamed) by any other
+    writer get their key too. Safe to re-run; returns
+    {table: (rows filled, rows whose name matches no party)}.
+    """
+    from app.ledger_summary import forget_summary_table
+    from app.models import StockistLedgerSummary
+    from app.party_keys import PARTY_KEYS, install_party_triggers, party_id_sql
+
+    report = {}
+    with db.engine.begin() as conn:
+        for model, (party, name_col, id_col) in PARTY_KEYS.items():
+            table = model.__tablename__
+            columns = {c['name'] for c in db.inspect(conn).get_columns(table)}
+            if id_col not in columns:
+                conn.execute(text(
+                    f"ALTER TABLE {table} ADD COLUMN {id_col} INTEGER REFERENCES {party.__tablename__}(id)"))
+
+            filled = conn.execute(text(
+                f"UPDATE {table} SET {id_col} = {party_id_sql(model, row=table)} WHERE {id_col} IS NULL"
+            )).rowcount
+            unmatched = conn.execute(text(f"SELECT COUNT(*) FROM {table} WHERE {id_col} IS NULL")).scalar()
+            report[table] = (filled - unmatched, unmatched)
+
+        install_party_triggers(conn)
+
+        # Superseded by the *_id indexes on the models
+        for name in ('ix_payment_seller_date', 'ix_purchase_seller_date',
+                     'ix_stock_data_stockist_date', 'ix_stock_data_stockist_wh_com_date',
+                     'ix_stock_exit_stockist_wh_com_date',
+                     'ix_loan_data_stockist_date', 'ix_loan_data_stockist_wh_date',
+                     'ix_margin_data_stockist_date', 'ix_margin_data_stockist_wh_date'):
+            conn.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+
+        # The materialized summary used to be keyed by name; it is derived, so just drop it
+        summary = StockistLedgerSummary.__tablename__
+        if db.inspect(conn).has_table(summary) and 'stockist_id' not in {
+                c['name'] for c in db.inspect(conn).get_columns(summary)}:
+            conn.execute(text(f"DROP TABLE {summary}"))
+            forget_summary_table()
+
+    return report
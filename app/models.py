@@ -37,6 +37,8 @@ class Payment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False, default=date.today)   # <-- Add this line!
     seller_name = db.Column(db.String(100), nullable=False)
+    seller_id = db.Column(db.Integer, db.ForeignKey('seller.id'))   # resolved from seller_name (app/party_keys.py)
+    seller = db.relationship('Seller')   # also makes a flush insert the Seller first
     warehouse = db.Column(db.String(100), nullable=False)
     commodity = db.Column(db.String(50), nullable=False)
     banking_name = db.Column(db.String(100), nullable=False)
@@ -44,13 +46,18 @@ class Payment(db.Model):
     ifsc = db.Column(db.String(20), nullable=False)
     amount_paid = db.Column(db.Float, nullable=False)
     bank_reference = db.Column(db.String(100), nullable=False)
+    __table_args__ = (
+        db.Index('ix_payment_seller_id_date', 'seller_id', 'date'),
+    )
 
 class Purchase(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    date = db.Column(db.String(20))
+    date = db.Column(db.Date)   # was String(20); convert old DBs with `flask migrate-purchase-dates` (ISO kept by triggers)
     rst_no = db.Column(db.String(50))
     warehouse = db.Column(db.String(100))
     seller_name = db.Column(db.String(100))
+    seller_id = db.Column(db.Integer, db.ForeignKey('seller.id'))
+    seller = db.relationship('Seller')
     mobile = db.Column(db.String(20))
     commodity = db.Column(db.String(50))
     quantity = db.Column(db.Float)
@@ -63,6 +70,8 @@ class Purchase(db.Model):
     quality = db.Column(db.String(20))
     __table_args__ = (
         db.UniqueConstraint('rst_no', 'warehouse', name='uix_rstno_warehouse'),
+        db.Index('ix_purchase_seller_id_date', 'seller_id', 'date'),
+        db.Index('ix_purchase_date', 'date'),
     )
 
 class Stockist(db.Model):
@@ -81,6 +90,8 @@ class StockData(db.Model):
     rst_no = db.Column(db.String(50), nullable=False)
     warehouse = db.Column(db.String(120), nullable=False)
     stockist_name = db.Column(db.String(120), nullable=False)
+    stockist_id = db.Column(db.Integer, db.ForeignKey('stockist.id'))   # resolved from stockist_name
+    stockist = db.relationship('Stockist')
     mobile = db.Column(db.String(20))
     commodity = db.Column(db.String(50))
     quantity = db.Column(db.Float)
@@ -92,6 +103,10 @@ class StockData(db.Model):
     net_cost = db.Column(db.Float)
     quality = db.Column(db.String(40))
     kind_of_stock = db.Column(db.String(20), default='self')   # Always set by backend
+    __table_args__ = (
+        db.Index('ix_stock_data_stockist_id_date', 'stockist_id', 'date'),
+        db.Index('ix_stock_data_stockist_id_wh_com_date', 'stockist_id', 'warehouse', 'commodity', 'date'),
+    )
 
 from app import db
 
@@ -100,6 +115,8 @@ class StockExit(db.Model):
     date = db.Column(db.Date, nullable=False)
     warehouse = db.Column(db.String(100), nullable=False)
     stockist_name = db.Column(db.String(100), nullable=False)
+    stockist_id = db.Column(db.Integer, db.ForeignKey('stockist.id'))
+    stockist = db.relationship('Stockist')
     mobile = db.Column(db.String(20), nullable=True)
     commodity = db.Column(db.String(30), nullable=False)
     quantity = db.Column(db.Float, nullable=False)
@@ -110,24 +127,39 @@ class StockExit(db.Model):
     handling = db.Column(db.Float, nullable=False)
     net_cost = db.Column(db.Float, nullable=False)
     quality = db.Column(db.String(30), nullable=True)
+    __table_args__ = (
+        db.Index('ix_stock_exit_stockist_id_wh_com_date', 'stockist_id', 'warehouse', 'commodity', 'date'),
+    )
 
 # models.py
 class LoanData(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False)
     stockist_name = db.Column(db.String(100), nullable=False)
+    stockist_id = db.Column(db.Integer, db.ForeignKey('stockist.id'))
+    stockist = db.relationship('Stockist')
     warehouse = db.Column(db.String(100))
     commodity = db.Column(db.String(30))
     loan_type = db.Column(db.String(30))  # e.g. "Cash", "Margin"
     amount = db.Column(db.Float, nullable=False)
+    __table_args__ = (
+        db.Index('ix_loan_data_stockist_id_date', 'stockist_id', 'date'),
+        db.Index('ix_loan_data_stockist_id_wh_date', 'stockist_id', 'warehouse', 'date'),
+    )
 
 class MarginData(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False)
     stockist_name = db.Column(db.String(100), nullable=False)
+    stockist_id = db.Column(db.Integer, db.ForeignKey('stockist.id'))
+    stockist = db.relationship('Stockist')
     warehouse = db.Column(db.String(100), nullable=False)
     commodity = db.Column(db.String(20), nullable=False)
     amount = db.Column(db.Float, nullable=False)
+    __table_args__ = (
+        db.Index('ix_margin_data_stockist_id_date', 'stockist_id', 'date'),
+        db.Index('ix_margin_data_stockist_id_wh_date', 'stockist_id', 'warehouse', 'date'),
+    )
 
 class CompanyLoan(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -154,3 +186,31 @@ class Expenditure(db.Model):
 
 
 
+
+class StockistLedgerSummary(db.Model):
+    # Materialized per stockist x warehouse x commodity totals, kept current by
+    # the listeners in app/ledger_summary.py (rebuild with `flask rebuild-ledger-summary`).
+    id = db.Column(db.Integer, primary_key=True)
+    stockist_id = db.Column(db.Integer, db.ForeignKey('stockist.id'), nullable=False)
+    warehouse = db.Column(db.String(120))
+    commodity = db.Column(db.String(50))
+    total_in = db.Column(db.Float, nullable=False, default=0)
+    total_out = db.Column(db.Float, nullable=False, default=0)
+    first_in_date = db.Column(db.Date)
+    stock_in_count = db.Column(db.Integer, nullable=False, default=0)
+    total_loan = db.Column(db.Float, nullable=False, default=0)
+    total_loan_cash = db.Column(db.Float, nullable=False, default=0)
+    total_loan_margin = db.Column(db.Float, nullable=False, default=0)
+    first_loan_date = db.Column(db.Date)
+    loan_count = db.Column(db.Integer, nullable=False, default=0)
+    total_margin_paid = db.Column(db.Float, nullable=False, default=0)
+    margin_count = db.Column(db.Integer, nullable=False, default=0)
+    __table_args__ = (
+        db.Index('ix_stockist_ledger_summary_key', 'stockist_id', 'warehouse', 'commodity'),
+    )
+
+class LedgerVersion(db.Model):
+    # Write counter per ledger table, bumped for every row written (SQLite triggers,
+    # else on every flush); fragments and ETags are keyed on these (app/fragment_cache.py).
+    table_name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,63 @@
+import base64
+import json
+from datetime import date, datetime
+from sqlalchemy import and_, or_
+
+PAGE_SIZE = 100
+
+
+# -------------------
+# Cursor Encoding
+# -------------------
+
+def encode_cursor(date_value, row_id):
+    if hasattr(date_value, 'isoformat'):
+        date_value = date_value.isoformat()
+    raw = json.dumps([date_value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, date_type=str):
+    # Raises ValueError on anything that is not a cursor we produced.
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as exc:
+        raise ValueError("invalid cursor") from exc
+    if not isinstance(row_id, int) or not (date_value is None or isinstance(date_value, str)):
+        raise ValueError("invalid cursor")
+    if date_value is not None and date_type is date:
+        date_value = date.fromisoformat(date_value)
+    elif date_value is not None and date_type is datetime:
+        date_value = datetime.fromisoformat(date_value)
+    return date_value, row_id
+
+
+# -------------------
+# Keyset Pages
+# -------------------
+
+def keyset_page(query, date_col, id_col, cursor=None, limit=PAGE_SIZE):
+    """Newest-first page of ``query`` ordered by (date, id), resuming after ``cursor``.
+
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is ``None`` on the last page.
+    Rows with a NULL date sort last, matching SQLite's DESC ordering.
+    """
+    if cursor:
+        after_date, after_id = decode_cursor(cursor, date_col.type.python_type)
+        if after_date is None:
+            query = query.filter(date_col.is_(None), id_col < after_id)
+        else:
+            query = query.filter(or_(
+                date_col < after_date,
+                and_(date_col == after_date, id_col < after_id),
+                date_col.is_(None),
+            ))
+
+    rows = query.order_by(date_col.desc(), id_col.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, date_col.key), getattr(last, id_col.key))
@@ -0,0 +1,89 @@
+from sqlalchemy import event, inspect, select, text
+from app.models import Seller, Stockist, Purchase, Payment, StockData, StockExit, LoanData, MarginData
+
+# ledger model -> (party model, name column, id column)
+PARTY_KEYS = {
+    Purchase: (Seller, 'seller_name', 'seller_id'),
+    Payment: (Seller, 'seller_name', 'seller_id'),
+    StockData: (Stockist, 'stockist_name', 'stockist_id'),
+    StockExit: (Stockist, 'stockist_name', 'stockist_id'),
+    LoanData: (Stockist, 'stockist_name', 'stockist_id'),
+    MarginData: (Stockist, 'stockist_name', 'stockist_id'),
+}
+
+
+# -------------------
+# Name -> Id
+# -------------------
+
+def party_id_sql(model, row='NEW'):
+    """SQL expression resolving ``row``'s party name to an id.
+
+    Party names are not unique, so a party whose mobile matches the ledger row
+    wins, then the oldest one. Used by the backfill and the insert triggers.
+    """
+    party, name_col, _ = PARTY_KEYS[model]
+    party_table = party.__tablename__
+    by_name = f"SELECT id FROM {party_table} WHERE name = {row}.{name_col}"
+    if 'mobile' not in model.__table__.c:
+        return f"({by_name} ORDER BY id LIMIT 1)"
+    # (SQLite cannot see outer columns from a subquery's ORDER BY, hence two lookups)
+    return (f"COALESCE(({by_name} AND mobile = {row}.mobile ORDER BY id LIMIT 1), "
+            f"({by_name} ORDER BY id LIMIT 1))")
+
+
+def resolve_party_id(connection, model, name, mobile=None):
+    party, _, _ = PARTY_KEYS[model]
+    query = select(party.id).where(party.name == name)
+    if mobile:
+        query = query.order_by((party.mobile == mobile).desc())
+    return connection.execute(query.order_by(party.id).limit(1)).scalar()
+
+
+def _fill_party_id(mapper, connection, target):
+    # Rows written through this app get their key before the INSERT/UPDATE;
+    # rows written elsewhere are covered by the triggers (install_party_triggers).
+    _, name_col, id_col = PARTY_KEYS[mapper.class_]
+    attrs = inspect(target).attrs
+    renamed = attrs[name_col].history.has_changes() and not attrs[id_col].history.has_changes()
+    if getattr(target, id_col) is None or renamed:
+        setattr(target, id_col, resolve_party_id(
+            connection, mapper.class_, getattr(target, name_col), getattr(target, 'mobile', None)))
+
+
+# -------------------
+# Triggers
+# -------------------
+
+def install_party_triggers(connection, models=None):
+    """Create the SQLite triggers that key rows inserted or renamed outside the ORM.
+
+    Idempotent; run after anything that (re)creates a ledger table, since
+    SQLite drops a table's triggers along with it.
+    """
+    for model in models or PARTY_KEYS:
+        _, name_col, id_col = PARTY_KEYS[model]
+        table = model.__tablename__
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table}_{id_col}_insert AFTER INSERT ON {table} "
+            f"WHEN NEW.{id_col} IS NULL BEGIN "
+            f"UPDATE {table} SET {id_col} = {party_id_sql(model)} WHERE id = NEW.id; END"))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table}_{id_col}_rename AFTER UPDATE OF {name_col} ON {table} "
+            f"WHEN NEW.{name_col} IS NOT OLD.{name_col} BEGIN "
+            f"UPDATE {table} SET {id_col} = {party_id_sql(model)} WHERE id = NEW.id; END"))
+
+
+def _create_party_triggers(table, connection, **kw):
+    # create_all() / Table.create(): a fresh ledger table gets its triggers straight away
+    if connection.dialect.name == 'sqlite':
+        install_party_triggers(connection, [model for model in PARTY_KEYS if model.__table__ is table])
+
+
+def register_listeners():
+    for model in PARTY_KEYS:
+        for name in ('before_insert', 'before_update'):
+            if not event.contains(model, name, _fill_party_id):
+                event.listen(model, name, _fill_party_id)
+        if not event.contains(model.__table__, 'after_create', _create_party_triggers):
+            event.listen(model.__table__, 'after_create', _create_party_triggers)
@@ -1,2 +1,3 @@
 from .auth import user_auth_bp
 from .views import user_view_bp
+from .api import user_api_bp
@@ -0,0 +1,227 @@
+import json
+from concurrent.futures import TimeoutError as FutureTimeout
+from datetime import date, datetime
+from flask import Blueprint, Response, current_app, request, send_file, stream_with_context
+from app import db
+from app.models import Purchase, Payment, StockData, StockExit, LoanData, MarginData
+from app.identity import current_identity
+from app.ledger import seller_balance, RENTAL_RATE, INTEREST_RATE
+from app.ledger_summary import stockist_dashboard
+from app.pagination import keyset_page, PAGE_SIZE
+from app.exports import ledger_rows as export_rows, csv_chunks, xlsx_file
+
+try:
+    import orjson
+except ImportError:  # stdlib json fallback
+    orjson = None
+
+MAX_PAGE_SIZE = 500
+
+user_api_bp = Blueprint('user_api', __name__, url_prefix='/user/api/v1')
+
+
+# -------------------
+# Serialization
+# -------------------
+
+def _default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def json_response(payload, status=200):
+    if orjson is not None:
+        body = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        body = json.dumps(payload, default=_default, ensure_ascii=False, separators=(',', ':'))
+    return Response(body, status=status, mimetype='application/json')
+
+
+def api_error(message, status):
+    return json_response({'error': message}, status)
+
+
+# -------------------
+# Ledger Resources
+# -------------------
+
+# resource -> (model, owner role, columns a client may ask for)
+LEDGERS = {
+    ('seller', 'purchases'): (Purchase, 'seller', (
+        'id', 'date', 'rst_no', 'warehouse', 'commodity', 'quantity', 'reduction',
+        'net_qty', 'rate', 'cost', 'handling', 'net_cost', 'quality')),
+    ('seller', 'payments'): (Payment, 'seller', (
+        'id', 'date', 'warehouse', 'commodity', 'banking_name', 'account_number',
+        'ifsc', 'amount_paid', 'bank_reference')),
+    ('stockist', 'stock'): (StockData, 'stockist', (
+        'id', 'date', 'rst_no', 'warehouse', 'commodity', 'quantity', 'reduction',
+        'net_qty', 'rate', 'cost', 'handling', 'net_cost', 'quality', 'kind_of_stock')),
+    ('stockist', 'exits'): (StockExit, 'stockist', (
+        'id', 'date', 'warehouse', 'commodity', 'quantity', 'reduction', 'net_qty',
+        'rate', 'cost', 'handling', 'net_cost', 'quality')),
+    ('stockist', 'loans'): (LoanData, 'stockist', (
+        'id', 'date', 'warehouse', 'commodity', 'loan_type', 'amount')),
+    ('stockist', 'margins'): (MarginData, 'stockist', (
+        'id', 'date', 'warehouse', 'commodity', 'amount')),
+}
+
+
+def _owner_id(role):
+    identity = current_identity()
+    return identity.seller_id if role == 'seller' else identity.stockist_id
+
+
+def _requested_fields(allowed):
+    # ?fields=date,amount  -> only those columns are selected; default is all of them
+    raw = request.args.get('fields')
+    if not raw:
+        return list(allowed)
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"unknown field(s): {', '.join(unknown)}")
+    return fields
+
+
+@user_api_bp.route('/<role>/<resource>')
+def ledger_page(role, resource):
+    """One keyset page of a ledger, newest first, with only the requested columns."""
+    if (role, resource) not in LEDGERS:
+        return api_error('not found', 404)
+    model, owner_role, allowed = LEDGERS[(role, resource)]
+    owner_id = _owner_id(owner_role)
+    if owner_id is None:
+        return api_error('login required', 401)
+
+    try:
+        fields = _requested_fields(allowed)
+        limit = min(int(request.args.get('limit', PAGE_SIZE)), MAX_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError('limit must be positive')
+    except ValueError as exc:
+        return api_error(str(exc), 400)
+
+    # id and date are always selected: the cursor is built from them
+    selected = list(dict.fromkeys(['id', 'date', *fields]))
+    query = (db.session.query(*(getattr(model, name) for name in selected))
+             .filter(getattr(model, f'{owner_role}_id') == owner_id))
+    try:
+        rows, next_cursor = keyset_page(query, model.date, model.id,
+                                        cursor=request.args.get('cursor'), limit=limit)
+    except ValueError:
+        return api_error('invalid cursor', 400)
+
+    return json_response({
+        'fields': fields,
+        'rows': [[getattr(row, name) for name in fields] for row in rows],
+        'next_cursor': next_cursor,
+    })
+
+
+@user_api_bp.route('/<role>/<resource>.<fmt>')
+def ledger_export(role, resource, fmt):
+    """Whole ledger as a CSV (streamed) or XLSX (write-only) statement download."""
+    if (role, resource) not in LEDGERS or fmt not in ('csv', 'xlsx'):
+        return api_error('not found', 404)
+    model, owner_role, allowed = LEDGERS[(role, resource)]
+    owner_id = _owner_id(owner_role)
+    if owner_id is None:
+        return api_error('login required', 401)
+    try:
+        fields = _requested_fields(allowed)
+    except ValueError as exc:
+        return api_error(str(exc), 400)
+
+    rows = export_rows(model, getattr(model, f'{owner_role}_id'), owner_id, fields)
+    filename = f"{resource}-{date.today().isoformat()}.{fmt}"
+    if fmt == 'csv':
+        return Response(
+            stream_with_context(csv_chunks(fields, rows)),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+        )
+    return send_file(
+        xlsx_file(resource, fields, rows),
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        as_attachment=True,
+        download_name=filename,
+    )
+
+
+# -------------------
+# Statements
+# -------------------
+
+def _open_pdf(path):
+    # Opened here, right away: a newer build of the same party may delete the file,
+    # and an open handle keeps reading the old file after that.
+    if path is None:
+        return None
+    try:
+        return open(path, 'rb')
+    except FileNotFoundError:
+        return None
+
+
+@user_api_bp.route('/seller/statement.pdf', defaults={'role': 'seller'})
+@user_api_bp.route('/stockist/statement.pdf', defaults={'role': 'stockist'})
+def statement_pdf(role):
+    """Account statement PDF; 202 while the worker is still rendering it."""
+    party_id = _owner_id(role)
+    if party_id is None:
+        return api_error('login required', 401)
+
+    store = current_app.extensions['statements']
+    today = date.today()
+    pdf = _open_pdf(store.cached(store.key(role, party_id, today)))
+    if pdf is None:
+        future = store.submit(current_app._get_current_object(), role, party_id, today)
+        try:
+            pdf = _open_pdf(future.result(timeout=current_app.config['STATEMENT_WAIT']))
+        except FutureTimeout:
+            pdf = None
+    if pdf is None:
+        response = json_response({'status': 'pending'}, 202)
+        response.headers['Retry-After'] = '2'
+        return response
+    return send_file(pdf, mimetype='application/pdf', as_attachment=True,
+                     download_name=f"{role}-statement-{today.isoformat()}.pdf")
+
+
+# -------------------
+# Summaries
+# -------------------
+
+@user_api_bp.route('/seller/summary')
+def seller_summary():
+    seller_id = _owner_id('seller')
+    if seller_id is None:
+        return api_error('login required', 401)
+    purchase_summary, payment_summary, payment_due = seller_balance(seller_id)
+    return json_response({
+        'purchases': purchase_summary,
+        'amount_paid': payment_summary['amount'],
+        'payment_due': payment_due,
+    })
+
+
+@user_api_bp.route('/stockist/summary')
+def stockist_summary():
+    stockist_id = _owner_id('stockist')
+    if stockist_id is None:
+        return api_error('login required', 401)
+    today = date.today()
+    material, loans, margins, rental_due, interest_due = stockist_dashboard(
+        stockist_id, RENTAL_RATE, INTEREST_RATE, today,
+        live=not current_app.config['USE_LEDGER_SUMMARY'])
+    return json_response({
+        'as_of': today,
+        'materials_mt': material,
+        'loans': loans,
+        'margins_paid': margins,
+        'rental_due': rental_due,
+        'rental_rate': RENTAL_RATE,
+        'interest_due': interest_due,
+        'interest_rate': INTEREST_RATE,
+    })
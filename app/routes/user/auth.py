@@ -1,4 +1,5 @@
 from flask import Blueprint, render_template, request, redirect, session, url_for, flash
+from app.identity import remember_identity
 
 # If you want to re-enable SMS later, just uncomment this import and the send call.
 # from utils.otp_sender import send_otp_fast2sms
@@ -47,12 +48,14 @@ def verify_otp():
     # Accept fixed OTP unconditionally in test mode
     if entered_otp == DEFAULT_OTP:
         session['mobile'] = mobile
+        remember_identity(mobile)
         return redirect(url_for('user_views.home'))
 
     # (Optional) also check store if you want
     expected_otp = otp_store.get(mobile)
     if expected_otp and entered_otp == expected_otp:
         session['mobile'] = mobile
+        remember_identity(mobile)
         return redirect(url_for('user_views.home'))
 
     flash("Invalid OTP. Please try again.", "danger")
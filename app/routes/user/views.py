@@ -1,8 +1,17 @@
-from flask import Blueprint, render_template, session, redirect, url_for
+from flask import Blueprint, render_template, stream_template, session, redirect, url_for, request, jsonify, abort, current_app
 from flask_login import login_required
-from app import db
-from app.models import Seller, Stockist, Purchase, Payment, LoanData, MarginData, StockData, StockExit
+from app import db, prime_hindi_names, get_lang
+from app.models import Purchase, Payment, LoanData, MarginData, StockData, StockExit
+from app.identity import current_identity
+from app.ledger import (rental_due_for, interest_due_for, seller_balance,
+                        material_summary_from, loan_summary_from, margin_summary_from,
+                        ledger_fingerprint, stockist_display_values, RENTAL_RATE, INTEREST_RATE)
+from app.ledger_summary import stockist_dashboard
+from app.fragment_cache import Sections
+from app.conditional import dashboard_etag, conditional_response
+from app.pagination import keyset_page
 from datetime import date
+from functools import cache
 
 def login_required(func):
     from functools import wraps
@@ -25,18 +34,16 @@ def home():
     if 'mobile' not in session:
         return redirect(url_for('user_auth.login'))
 
-    mobile = session['mobile']
-    seller = Seller.query.filter_by(mobile=mobile).first()
-    stockist = Stockist.query.filter_by(mobile=mobile).first()
+    identity = current_identity()
 
-    is_seller = seller is not None
-    is_stockist = stockist is not None
+    is_seller = identity.seller_id is not None
+    is_stockist = identity.stockist_id is not None
 
     # Prefer seller name, fallback to stockist
-    if is_seller and seller.name:
-        display_name = seller.name
-    elif is_stockist and stockist.name:
-        display_name = stockist.name
+    if is_seller and identity.seller_name:
+        display_name = identity.seller_name
+    elif is_stockist and identity.stockist_name:
+        display_name = identity.stockist_name
     else:
         display_name = "User"
 
@@ -48,166 +55,232 @@ def home():
 @user_view_bp.route('/seller')
 @login_required
 def seller_module():
-    mobile = session.get('mobile')
-    seller = Seller.query.filter_by(mobile=mobile).first()
-    if not seller:
+    # Ledger rows are matched on the integer seller key, not the free-text name
+    seller_id = current_identity().seller_id
+    if seller_id is None:
         return redirect(url_for('user_auth.login'))
 
-    # Get seller name to match purchase/payment tables
-    name = seller.name
-
-    # Purchases
-    purchases = Purchase.query.filter_by(seller_name=name).order_by(Purchase.date.desc()).all()
-    purchase_summary = {
-        'quantity': sum(p.quantity or 0 for p in purchases),
-        'reduction': sum(p.reduction or 0 for p in purchases),
-        'net_qty': sum(p.net_qty or 0 for p in purchases),
-        'cost': sum(p.cost or 0 for p in purchases),
-        'handling': sum(p.handling or 0 for p in purchases),
-        'net_cost': sum(p.net_cost or 0 for p in purchases)
-    }
-
-    # Payments
-    payments  = Payment.query.filter_by(seller_name=name).order_by(Payment.date.desc()).all()
-    payment_summary = {
-        'amount': sum(p.amount_paid or 0 for p in payments)
-    }
-
-    # Payment Due
-    net_cost = purchase_summary.get('net_cost') or 0
-    amount_paid = payment_summary.get('amount') or 0
-    payment_due = net_cost - amount_paid
-
-    return render_template(
+    today = date.today()
+    sources = [
+        (Purchase, Purchase.seller_id, seller_id),
+        (Payment, Payment.seller_id, seller_id),
+    ]
+    etag = dashboard_etag('seller', seller_id, sources, ledger_fingerprint(sources), today)
+    sections = Sections(current_app.extensions.get('fragment_cache'), ('seller', seller_id), get_lang())
+
+    @cache
+    def balance():
+        # Summaries and Payment Due from SQL aggregates
+        return seller_balance(seller_id)
+
+    # Purchases and payments: first page only
+    def render_purchases():
+        purchases, purchases_cursor = keyset_page(
+            Purchase.query.filter_by(seller_id=seller_id), Purchase.date, Purchase.id)
+        prime_hindi_names(v for p in purchases for v in (p.warehouse, p.commodity))
+        return render_template('user/_seller_purchases.html',
+                               purchases=purchases,
+                               purchases_cursor=purchases_cursor,
+                               purchase_summary=balance()[0])
+
+    def render_payments():
+        payments, payments_cursor = keyset_page(
+            Payment.query.filter_by(seller_id=seller_id), Payment.date, Payment.id)
+        return render_template('user/_seller_payments.html',
+                               payments=payments,
+                               payments_cursor=payments_cursor,
+                               payment_summary=balance()[1])
+
+    def render_due():
+        purchase_summary, payment_summary, payment_due = balance()
+        return render_template('user/_seller_due.html',
+                               net_cost=purchase_summary['net_cost'],
+                               amount_paid=payment_summary['amount'],
+                               payment_due=payment_due,
+                               today=today.strftime("%d/%m/%Y"))
+
+    return conditional_response(etag, lambda: render_template(
         'user/seller_module.html',
-        purchases=purchases,
-        payments=payments,
-        purchase_summary=purchase_summary,
-        payment_summary=payment_summary,
-        net_cost=net_cost,
-        amount_paid=amount_paid,
-        payment_due=payment_due,
-        today=date.today().strftime("%d/%m/%Y")
+        sections={
+            'purchases': sections.render('purchases', ['purchase'], render_purchases),
+            'payments': sections.render('payments', ['payment'], render_payments),
+            'due': sections.render('due', ['purchase', 'payment'], render_due, today),
+        },
+    ))
+
+@user_view_bp.route('/seller/purchases')
+@login_required
+def seller_purchases_page():
+    seller_id = current_identity().seller_id
+    if seller_id is None:
+        abort(404)
+
+    try:
+        purchases, next_cursor = keyset_page(
+            Purchase.query.filter_by(seller_id=seller_id), Purchase.date, Purchase.id,
+            cursor=request.args.get('cursor'))
+    except ValueError:
+        abort(400)
+
+    prime_hindi_names(v for p in purchases for v in (p.warehouse, p.commodity))
+    return jsonify(
+        html=render_template('user/_purchase_rows.html', purchases=purchases),
+        count=len(purchases),
+        next_cursor=next_cursor,
+    )
+
+@user_view_bp.route('/seller/payments')
+@login_required
+def seller_payments_page():
+    seller_id = current_identity().seller_id
+    if seller_id is None:
+        abort(404)
+
+    try:
+        payments, next_cursor = keyset_page(
+            Payment.query.filter_by(seller_id=seller_id), Payment.date, Payment.id,
+            cursor=request.args.get('cursor'))
+    except ValueError:
+        abort(400)
+
+    return jsonify(
+        html=render_template('user/_payment_rows.html', payments=payments),
+        count=len(payments),
+        next_cursor=next_cursor,
     )
 
 @user_view_bp.route('/stockist')
 @login_required
 def stockist_module():
-    mobile = session.get('mobile')
-    stockist = Stockist.query.filter_by(mobile=mobile).first()
-    if not stockist:
+    stockist_id = current_identity().stockist_id
+    if stockist_id is None:
         return redirect(url_for('user_auth.login'))
 
-    name = stockist.name
+    rental_rate = RENTAL_RATE
+    interest_rate = INTEREST_RATE
+    today = date.today()
+    sources = [
+        (StockData, StockData.stockist_id, stockist_id),
+        (StockExit, StockExit.stockist_id, stockist_id),
+        (LoanData, LoanData.stockist_id, stockist_id),
+        (MarginData, MarginData.stockist_id, stockist_id),
+    ]
+    fingerprint = ledger_fingerprint(sources)
+    etag = dashboard_etag('stockist', stockist_id, sources, fingerprint, today)
+    sections = Sections(current_app.extensions.get('fragment_cache'), ('stockist', stockist_id), get_lang())
+
+    use_summary = current_app.config['USE_LEDGER_SUMMARY']
+
+    @cache
+    def dashboard():
+        # Every summary in one query: from the materialized table, or live from the ledgers
+        return stockist_dashboard(stockist_id, rental_rate, interest_rate, today, live=not use_summary)
 
     # --------------------------------
     # 1. My Materials Stored
     # --------------------------------
-    stock_data = StockData.query.filter_by(stockist_name=name).order_by(StockData.date.desc()).all()
-
-    # Summary by warehouse and commodity (in MT)
-    material_summary = {}
-    for entry in stock_data:
-        wh = entry.warehouse
-        com = entry.commodity
-        qty = (entry.quantity or 0) / 1000  # Convert kg to MT
-
-        if wh not in material_summary:
-            material_summary[wh] = {}
-        material_summary[wh][com] = material_summary[wh].get(com, 0) + qty
+    def render_materials():
+        stock_data = StockData.query.filter_by(stockist_id=stockist_id).order_by(StockData.date.desc()).all()
+        material_summary = dashboard()[0] if use_summary else material_summary_from(stock_data)
+        prime_hindi_names([*material_summary, *(v for e in stock_data for v in (e.warehouse, e.commodity))])
+        return render_template('user/_stockist_materials.html',
+                               stock_data=stock_data,
+                               material_summary=material_summary)
 
     # --------------------------------
     # 2. Loans Received
     # --------------------------------
-    loan_data  = LoanData.query.filter_by(stockist_name=name).order_by(LoanData.date.desc()).all()
-
-    # Initialize summary structure
-    loan_summary = {}
-    for entry in loan_data:
-        wh = entry.warehouse
-        loan_type = entry.loan_type
-        amt = entry.amount or 0
-
-        if wh not in loan_summary:
-            loan_summary[wh] = {'cash': 0, 'margin': 0}
-
-        if loan_type and loan_type.lower() == 'cash':
-            loan_summary[wh]['cash'] += amt
-        elif loan_type and loan_type.lower() == 'margin':
-            loan_summary[wh]['margin'] += amt
+    def render_loans():
+        loan_data = LoanData.query.filter_by(stockist_id=stockist_id).order_by(LoanData.date.desc()).all()
+        loan_summary = dashboard()[1] if use_summary else loan_summary_from(loan_data)
+        prime_hindi_names([*loan_summary, *(v for e in loan_data for v in (e.warehouse, e.commodity, e.loan_type))])
+        return render_template('user/_stockist_loans.html',
+                               loan_data=loan_data,
+                               loan_summary=loan_summary)
 
     # --------------------------------
     # 3. Margins Paid
     # --------------------------------
-    margin_data = MarginData.query.filter_by(stockist_name=name).order_by(MarginData.date.desc()).all()
-
-    margin_summary = {}
-    for entry in margin_data:
-        wh = entry.warehouse
-        amt = entry.amount or 0
-
-        if wh not in margin_summary:
-            margin_summary[wh] = 0
-        margin_summary[wh] += amt
+    def render_margins():
+        margin_data = MarginData.query.filter_by(stockist_id=stockist_id).order_by(MarginData.date.desc()).all()
+        margin_summary = dashboard()[2] if use_summary else margin_summary_from(margin_data)
+        prime_hindi_names([*margin_summary, *(v for e in margin_data for v in (e.warehouse, e.commodity))])
+        return render_template('user/_stockist_margins.html',
+                               margin_data=margin_data,
+                               margin_summary=margin_summary)
 
     # --------------------------------
-    # 4. Rental Due (by warehouse and commodity)
+    # 4. Rental Due (net stock and first in-date per pair in one grouped query)
     # --------------------------------
-    rental_rate = 3.334
-    today = date.today()
-
-    # Collect all (warehouse, commodity) pairs
-    pairs = set((entry.warehouse, entry.commodity) for entry in stock_data)
-    rental_due = {}
-    for wh, commodity in pairs:
-        # Net stock: total in - total out
-        total_in = sum((e.quantity or 0) for e in StockData.query.filter_by(stockist_name=name, warehouse=wh, commodity=commodity).all())
-        total_out = sum((e.quantity or 0) for e in StockExit.query.filter_by(stockist_name=name, warehouse=wh, commodity=commodity).all())
-        net_qty_kg = total_in - total_out
-        net_qty_mt = net_qty_kg / 1000
-
-        # Rental = net_qty_mt * rental_rate * number of days since earliest entry for this stockist/warehouse/commodity
-        first_entry = StockData.query.filter_by(stockist_name=name, warehouse=wh, commodity=commodity).order_by(StockData.date).first()
-        if first_entry:
-            num_days = (today - first_entry.date).days + 1
-        else:
-            num_days = 0
-
-        total_rental = net_qty_mt * rental_rate * num_days if net_qty_mt > 0 else 0
-        if wh not in rental_due:
-            rental_due[wh] = {}
-        rental_due[wh][commodity] = round(total_rental, 2)
+    def render_rental():
+        rental_due = dashboard()[3] if use_summary else rental_due_for(stockist_id, rental_rate, today)
+        prime_hindi_names(rental_due)
+        return render_template('user/_stockist_rental.html',
+                               rental_due=rental_due,
+                               rental_rate=rental_rate,
+                               today=today.strftime("%d/%m/%Y"))
 
     # --------------------------------
-    # 5. Interest Due (by warehouse)
+    # 5. Interest Due (principal and first-loan date per warehouse in one grouped query)
     # --------------------------------
-    interest_rate = 13.75
-    warehouses = set(entry.warehouse for entry in loan_data)
-    interest_due = {}
-    for wh in warehouses:
-        total_loan = sum((e.amount or 0) for e in LoanData.query.filter_by(stockist_name=name, warehouse=wh).all())
-        total_margin = sum((e.amount or 0) for e in MarginData.query.filter_by(stockist_name=name, warehouse=wh).all())
-        first_loan = LoanData.query.filter_by(stockist_name=name, warehouse=wh).order_by(LoanData.date).first()
-        if first_loan:
-            num_days = (today - first_loan.date).days + 1
-        else:
-            num_days = 0
-
-        principal = total_loan - total_margin
-        interest_amt = principal * (interest_rate / 100) * (num_days / 365) if principal > 0 and num_days > 0 else 0
-        interest_due[wh] = round(interest_amt, 2)
-
-    return render_template(
+    def render_interest():
+        interest_due = dashboard()[4] if use_summary else interest_due_for(stockist_id, interest_rate, today)
+        prime_hindi_names(interest_due)
+        return render_template('user/_stockist_interest.html',
+                               interest_due=interest_due,
+                               interest_rate=interest_rate,
+                               today=today.strftime("%d/%m/%Y"))
+
+    # Large histories are streamed row by row instead of being rendered in memory
+    (stock_rows, _), _, (loan_rows, _), (margin_rows, _) = fingerprint
+    threshold = current_app.config['STREAM_HISTORY_ROWS']
+    if threshold and stock_rows + loan_rows + margin_rows > threshold:
+        return conditional_response(etag, lambda: stream_stockist_module(
+            stockist_id, dashboard(), {
+                'rental': sections.render('rental', ['stock_data', 'stock_exit'], render_rental, today),
+                'interest': sections.render('interest', ['loan_data', 'margin_data'], render_interest, today),
+            }))
+
+    return conditional_response(etag, lambda: render_template(
+        'user/stockist_module.html',
+        sections={
+            'materials': sections.render('materials', ['stock_data'], render_materials),
+            'loans': sections.render('loans', ['loan_data'], render_loans),
+            'margins': sections.render('margins', ['margin_data'], render_margins),
+            'rental': sections.render('rental', ['stock_data', 'stock_exit'], render_rental, today),
+            'interest': sections.render('interest', ['loan_data', 'margin_data'], render_interest, today),
+        },
+    ))
+
+
+def stream_stockist_module(stockist_id, dashboard, sections):
+    # Summaries come from SQL up front; the three histories are read through
+    # yield_per cursors while the template is being sent, so memory stays flat.
+    material_summary, loan_summary, margin_summary = dashboard[:3]
+    prime_hindi_names([*material_summary, *loan_summary, *margin_summary, *stockist_display_values(stockist_id)])
+
+    batch = current_app.config['STREAM_BATCH_SIZE']
+    return _buffered(stream_template(
         'user/stockist_module.html',
-        stock_data=stock_data,
+        streaming=True,
+        stock_data=StockData.query.filter_by(stockist_id=stockist_id).order_by(StockData.date.desc()).yield_per(batch),
+        loan_data=LoanData.query.filter_by(stockist_id=stockist_id).order_by(LoanData.date.desc()).yield_per(batch),
+        margin_data=MarginData.query.filter_by(stockist_id=stockist_id).order_by(MarginData.date.desc()).yield_per(batch),
         material_summary=material_summary,
-        loan_data=loan_data,
         loan_summary=loan_summary,
-        margin_data=margin_data,
         margin_summary=margin_summary,
-        rental_due=rental_due,
-        rental_rate=rental_rate,
-        interest_due=interest_due,
-        interest_rate=interest_rate,
-        today=today.strftime("%d/%m/%Y")
-    )
\ No newline at end of file
+        sections=sections,
+    ))
+
+
+def _buffered(chunks, size=4096):
+    # Jinja yields tiny pieces; send them in a few KB at a time
+    buffer, length = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield ''.join(buffer)
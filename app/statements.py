@@ -0,0 +1,423 @@
+import hashlib
+import os
+import string
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from functools import lru_cache
+from app import db, format_inr, format_date
+from app.models import Seller, Stockist, Purchase, Payment, StockData, StockExit, LoanData, MarginData
+from app.fragment_cache import ledger_versions
+from app.ledger import (ledger_fingerprint, seller_balance, purchase_totals, payment_totals,
+                        PURCHASE_TOTAL_FIELDS, RENTAL_RATE, INTEREST_RATE)
+from app.ledger_summary import stockist_dashboard, summary_rows, dashboard_from_rows
+from app.exports import ledger_rows, ledger_rows_by_owner
+
+# Bump when the layout changes so cached PDFs are rebuilt
+LAYOUT_VERSION = 1
+
+STATEMENT_SOURCES = {
+    'seller': ((Purchase, Purchase.seller_id), (Payment, Payment.seller_id)),
+    'stockist': ((StockData, StockData.stockist_id), (StockExit, StockExit.stockist_id),
+                 (LoanData, LoanData.stockist_id), (MarginData, MarginData.stockist_id)),
+}
+
+# Glyphs a statement can contain; a configured TTF is cut down to these once
+STATEMENT_CHARSET = string.printable + '₹'
+
+
+# -------------------
+# Cache Key
+# -------------------
+
+def statement_key(role, party_id, today, *extra):
+    """Changes whenever anything printed on the statement could have changed."""
+    sources = [(model, column, party_id) for model, column in STATEMENT_SOURCES[role]]
+    versions = ledger_versions()
+    state = (
+        LAYOUT_VERSION, role, party_id, today.isoformat(), extra,
+        ledger_fingerprint(sources),
+        tuple(versions[model.__tablename__] for model, _ in STATEMENT_SOURCES[role]),
+    )
+    return f"{role}-{party_id}-{hashlib.sha1(repr(state).encode()).hexdigest()[:16]}"
+
+
+# -------------------
+# Fonts
+# -------------------
+
+@lru_cache(maxsize=None)
+def subset_font(font_path, cache_dir):
+    """(path, has_rupee) for ``font_path`` cut down to STATEMENT_CHARSET, built once per process.
+
+    Every document then embeds this small file, so fpdf2's per-document parse
+    and subset step works on a few hundred glyphs instead of the whole font.
+    """
+    from fontTools import subset as ftsubset
+    from fontTools.ttLib import TTFont
+
+    digest = hashlib.sha1(f"{os.path.abspath(font_path)}:{STATEMENT_CHARSET}".encode()).hexdigest()[:12]
+    target = os.path.join(cache_dir, f"_font-{digest}.ttf")
+    if not os.path.exists(target):
+        os.makedirs(cache_dir, exist_ok=True)
+        font = TTFont(font_path)
+        subsetter = ftsubset.Subsetter(ftsubset.Options(notdef_outline=True))
+        subsetter.populate(unicodes=[ord(c) for c in STATEMENT_CHARSET])
+        subsetter.subset(font)
+        _atomic_write(target, font.save)
+    return target, ord('₹') in TTFont(target).getBestCmap()
+
+
+def _atomic_write(path, write):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+# -------------------
+# Rendering
+# -------------------
+
+class StatementPDF:
+    """Thin layout helper over fpdf2: header, summary lines and paged tables."""
+
+    def __init__(self, title, party_name, today, font=None):
+        from fpdf import FPDF
+
+        self.pdf = FPDF(orientation='P', unit='mm', format='A4')
+        self.pdf.set_auto_page_break(auto=True, margin=12)
+        self.pdf.set_margins(10, 10, 10)
+        if font:
+            font_path, has_rupee = font
+            self.pdf.add_font('Statement', '', font_path)
+            self.pdf.add_font('Statement', 'B', font_path)
+            self.family, self.currency = 'Statement', '₹' if has_rupee else 'Rs. '
+        else:
+            # Core fonts are never embedded (cheapest), but are Latin-1 only
+            self.family, self.currency = 'Helvetica', 'Rs. '
+
+        self.pdf.add_page()
+        self._font('B', 14)
+        self.pdf.cell(0, 8, title, new_x='LMARGIN', new_y='NEXT')
+        self._font('', 10)
+        self.pdf.cell(0, 6, self.text(party_name), new_x='LMARGIN', new_y='NEXT')
+        self.pdf.cell(0, 6, f"As of {today.strftime('%d/%m/%Y')}", new_x='LMARGIN', new_y='NEXT')
+        self.pdf.ln(2)
+
+    def _font(self, style, size):
+        self.pdf.set_font(self.family, style, size)
+
+    def text(self, value):
+        value = '' if value is None else str(value)
+        if self.family == 'Helvetica':
+            value = value.encode('latin-1', 'replace').decode('latin-1')
+        return value
+
+    def money(self, value):
+        return format_inr(value or 0).replace('₹', self.currency)
+
+    def heading(self, text):
+        self.pdf.ln(3)
+        self._font('B', 11)
+        self.pdf.cell(0, 7, text, new_x='LMARGIN', new_y='NEXT')
+
+    def line(self, label, value):
+        self._font('', 9)
+        self.pdf.cell(70, 5, self.text(label))
+        self._font('B', 9)
+        self.pdf.cell(0, 5, self.text(value), new_x='LMARGIN', new_y='NEXT')
+
+    def table(self, columns, rows):
+        """``columns``: [(header, width_mm, align)]; ``rows`` may be any iterable."""
+        def header():
+            self._font('B', 8)
+            self.pdf.set_fill_color(230, 230, 230)
+            for title, width, align in columns:
+                self.pdf.cell(width, 6, title, border=1, align=align, fill=True)
+            self.pdf.ln()
+            self._font('', 8)
+
+        # Body rows are drawn with text() and lines rather than cell(): cell()'s
+        # text layout dominates render time on statements with long histories.
+        pdf = self.pdf
+        left = pdf.l_margin
+        right = left + sum(width for _, width, _ in columns)
+        header()
+        for row in rows:
+            if pdf.will_page_break(5):
+                pdf.add_page()
+                header()
+            y = pdf.get_y()
+            x = left
+            for (_, width, align), value in zip(columns, row):
+                value = self.text(value)
+                offset = width - 1 - pdf.get_string_width(value) if align == 'R' else 1
+                pdf.text(x + offset, y + 3.5, value)
+                x += width
+                pdf.line(x, y, x, y + 5)
+            pdf.line(left, y, left, y + 5)
+            pdf.line(left, y + 5, right, y + 5)
+            pdf.set_y(y + 5)
+
+    def output(self, path):
+        self.pdf.output(path)
+
+
+# Ledger columns each statement table prints, in order
+SELLER_LEDGERS = {
+    'purchases': (Purchase, ('date', 'rst_no', 'warehouse', 'commodity', 'net_qty', 'rate', 'net_cost')),
+    'payments': (Payment, ('date', 'warehouse', 'commodity', 'bank_reference', 'amount_paid')),
+}
+STOCKIST_LEDGERS = {
+    'stock': (StockData, ('date', 'rst_no', 'warehouse', 'commodity', 'quantity', 'quality')),
+    'loans': (LoanData, ('date', 'warehouse', 'commodity', 'loan_type', 'amount')),
+    'margins': (MarginData, ('date', 'warehouse', 'commodity', 'amount')),
+}
+
+
+def write_seller_statement(path, name, today, balance, purchases, payments, font=None):
+    """``balance`` is seller_balance()'s triple; ``purchases``/``payments`` are SELLER_LEDGERS rows."""
+    purchase_summary, payment_summary, payment_due = balance
+    doc = StatementPDF('Seller Account Statement', name, today, font)
+
+    doc.heading('Summary')
+    doc.line('Net quantity', f"{(purchase_summary['net_qty'] or 0) / 1000:,.2f} MT")
+    doc.line('Cost', doc.money(purchase_summary['cost']))
+    doc.line('Handling', doc.money(purchase_summary['handling']))
+    doc.line('Total cost', doc.money(purchase_summary['net_cost']))
+    doc.line('Amount paid', doc.money(payment_summary['amount']))
+    doc.line('Payment due', doc.money(payment_due))
+
+    doc.heading('Purchases')
+    doc.table(
+        [('Date', 20, 'L'), ('RST No', 20, 'L'), ('Warehouse', 36, 'L'), ('Commodity', 26, 'L'),
+         ('Net Qty (kg)', 24, 'R'), ('Rate', 18, 'R'), ('Total', 46, 'R')],
+        ((format_date(d), rst, wh, com, f"{qty or 0:,.2f}", f"{rate or 0:,.2f}", doc.money(total))
+         for d, rst, wh, com, qty, rate, total in purchases),
+    )
+
+    doc.heading('Payments')
+    doc.table(
+        [('Date', 20, 'L'), ('Warehouse', 40, 'L'), ('Commodity', 30, 'L'),
+         ('Reference', 50, 'L'), ('Amount', 50, 'R')],
+        ((format_date(d), wh, com, ref, doc.money(amount))
+         for d, wh, com, ref, amount in payments),
+    )
+    doc.output(path)
+
+
+def write_stockist_statement(path, name, today, dashboard, stock, loans, margins, font=None):
+    """``dashboard`` is stockist_dashboard()'s tuple; the rest are STOCKIST_LEDGERS rows."""
+    materials, loan_summary, margin_summary, rental_due, interest_due = dashboard
+    doc = StatementPDF('Stockist Account Statement', name, today, font)
+
+    doc.heading('Summary by warehouse')
+    warehouses = sorted(
+        set(materials) | set(loan_summary) | set(margin_summary) | set(rental_due) | set(interest_due),
+        key=str)
+    doc.table(
+        [('Warehouse', 34, 'L'), ('Stored (MT)', 24, 'R'), ('Loans', 34, 'R'),
+         ('Margin Paid', 32, 'R'), ('Rental Due', 33, 'R'), ('Interest Due', 33, 'R')],
+        ((wh,
+          f"{sum(materials.get(wh, {}).values()):,.2f}",
+          doc.money(sum(loan_summary.get(wh, {}).values())),
+          doc.money(margin_summary.get(wh, 0)),
+          doc.money(sum(rental_due.get(wh, {}).values())),
+          doc.money(interest_due.get(wh, 0)))
+         for wh in warehouses),
+    )
+    doc.line('Rental rate', f"{doc.currency}{RENTAL_RATE} per MT per day")
+    doc.line('Interest rate', f"{INTEREST_RATE}% per annum")
+
+    doc.heading('Stock received')
+    doc.table(
+        [('Date', 20, 'L'), ('RST No', 22, 'L'), ('Warehouse', 40, 'L'), ('Commodity', 30, 'L'),
+         ('Quantity (kg)', 34, 'R'), ('Quality', 44, 'L')],
+        ((format_date(d), rst, wh, com, f"{qty or 0:,.2f}", quality)
+         for d, rst, wh, com, qty, quality in stock),
+    )
+
+    doc.heading('Loans')
+    doc.table(
+        [('Date', 20, 'L'), ('Warehouse', 45, 'L'), ('Commodity', 35, 'L'),
+         ('Type', 30, 'L'), ('Amount', 60, 'R')],
+        ((format_date(d), wh, com, loan_type, doc.money(amount))
+         for d, wh, com, loan_type, amount in loans),
+    )
+
+    doc.heading('Margins paid')
+    doc.table(
+        [('Date', 20, 'L'), ('Warehouse', 55, 'L'), ('Commodity', 45, 'L'), ('Amount', 70, 'R')],
+        ((format_date(d), wh, com, doc.money(amount))
+         for d, wh, com, amount in margins),
+    )
+    doc.output(path)
+
+
+def render_seller_statement(seller_id, today, path, font=None):
+    purchases, payments = (ledger_rows(model, model.seller_id, seller_id, fields)
+                           for model, fields in SELLER_LEDGERS.values())
+    write_seller_statement(path, db.session.get(Seller, seller_id).name, today,
+                           seller_balance(seller_id), purchases, payments, font)
+
+
+def render_stockist_statement(stockist_id, today, path, font=None, use_summary=False):
+    stock, loans, margins = (ledger_rows(model, model.stockist_id, stockist_id, fields)
+                             for model, fields in STOCKIST_LEDGERS.values())
+    dashboard = stockist_dashboard(stockist_id, RENTAL_RATE, INTEREST_RATE, today, live=not use_summary)
+    write_stockist_statement(path, db.session.get(Stockist, stockist_id).name, today,
+                             dashboard, stock, loans, margins, font)
+
+
+# -------------------
+# Bulk Runs
+# -------------------
+
+class _OwnerGroups:
+    """Walks ledger_rows_by_owner() alongside an ascending list of owner ids."""
+
+    def __init__(self, groups):
+        self._groups = iter(groups)
+        self._current = next(self._groups, None)
+
+    def take(self, owner_id):
+        while self._current is not None and self._current[0] < owner_id:
+            self._current = next(self._groups, None)
+        if self._current is not None and self._current[0] == owner_id:
+            rows = self._current[1]
+            self._current = next(self._groups, None)
+            return rows
+        return []
+
+
+def _owner_groups(ledgers, owner_attr, owner_ids):
+    return {
+        name: _OwnerGroups(ledger_rows_by_owner(model, getattr(model, owner_attr), owner_ids, fields))
+        for name, (model, fields) in ledgers.items()
+    }
+
+
+def write_batch(role, party_ids, out_dir, today, font=None, use_summary=False):
+    """Write ``{role}-{id}.pdf`` for every party in ``party_ids``; returns (count, bytes).
+
+    Totals come from one grouped query per ledger for the whole batch and
+    detail rows from one ordered scan per ledger, so the query count does
+    not grow with the number of parties.
+    """
+    party_ids = sorted(party_ids)
+    party = Seller if role == 'seller' else Stockist
+    names = dict(db.session.query(party.id, party.name).filter(party.id.in_(party_ids)))
+    written = 0
+
+    if role == 'seller':
+        purchases, payments = purchase_totals(party_ids), payment_totals(party_ids)
+        groups = _owner_groups(SELLER_LEDGERS, 'seller_id', party_ids)
+    else:
+        summaries = summary_rows(party_ids, live=not use_summary)
+        groups = _owner_groups(STOCKIST_LEDGERS, 'stockist_id', party_ids)
+
+    for party_id in party_ids:
+        path = os.path.join(out_dir, f"{role}-{party_id}.pdf")
+        if role == 'seller':
+            purchase_summary = purchases.get(party_id) or dict.fromkeys(PURCHASE_TOTAL_FIELDS, 0)
+            paid = payments.get(party_id, 0)
+            write_seller_statement(
+                path, names.get(party_id), today,
+                (purchase_summary, {'amount': paid}, purchase_summary['net_cost'] - paid),
+                groups['purchases'].take(party_id), groups['payments'].take(party_id), font)
+        else:
+            write_stockist_statement(
+                path, names.get(party_id), today,
+                dashboard_from_rows(summaries[party_id], RENTAL_RATE, INTEREST_RATE, today),
+                groups['stock'].take(party_id), groups['loans'].take(party_id),
+                groups['margins'].take(party_id), font)
+        written += os.path.getsize(path)
+    return len(party_ids), written
+
+
+# -------------------
+# Store and Worker
+# -------------------
+
+class StatementStore:
+    """Generated PDFs on disk, named by statement_key(), rendered on a worker pool."""
+
+    def __init__(self, directory, workers=2, font_path=None, use_summary=False):
+        self.directory = directory
+        self.font_path = font_path
+        self.use_summary = use_summary
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='statement')
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def key(self, role, party_id, today):
+        return statement_key(role, party_id, today, self.use_summary, self.font_path)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def cached(self, key):
+        path = self.path(key)
+        return path if os.path.exists(path) else None
+
+    def build(self, role, party_id, today=None):
+        """Render (or reuse) one statement in the calling thread; returns its path.
+
+        Needs an app context. Older statements of the same party are removed.
+        """
+        today = today or date.today()
+        path = self.path(self.key(role, party_id, today))
+        if os.path.exists(path):
+            return path
+        os.makedirs(self.directory, exist_ok=True)
+
+        font = subset_font(self.font_path, self.directory) if self.font_path else None
+        if role == 'seller':
+            _atomic_write(path, lambda tmp: render_seller_statement(party_id, today, tmp, font))
+        else:
+            _atomic_write(path, lambda tmp: render_stockist_statement(
+                party_id, today, tmp, font, self.use_summary))
+
+        # Requests already sending an older file hold it open, so removing it is safe
+        prefix = f"{role}-{party_id}-"
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name != os.path.basename(path):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:  # already gone, or still open on a platform that forbids removing it
+                    pass
+        return path
+
+    def submit(self, app, role, party_id, today=None):
+        """Future for build() on the worker pool; concurrent requests share one job."""
+        job = (role, party_id)
+        with self._lock:
+            future = self._pending.get(job)
+            if future is None:
+                future = self.executor.submit(self._build_in_context, app, role, party_id, today)
+                self._pending[job] = future
+                future.add_done_callback(lambda _: self._forget(job))
+            return future
+
+    def _forget(self, job):
+        with self._lock:
+            self._pending.pop(job, None)
+
+    def _build_in_context(self, app, role, party_id, today):
+        with app.app_context():
+            return self.build(role, party_id, today)
+
+
+def init_statements(app):
+    app.extensions['statements'] = StatementStore(
+        app.config['STATEMENT_DIR'],
+        workers=app.config['STATEMENT_WORKERS'],
+        font_path=app.config.get('STATEMENT_FONT_PATH'),
+        use_summary=app.config['USE_LEDGER_SUMMARY'],
+    )
@@ -0,0 +1,162 @@
+import random
+from datetime import date, timedelta
+from app import db
+from app.models import Seller, Stockist, Purchase, Payment, StockData, StockExit, LoanData, MarginData
+from app.fragment_cache import bump_versions, VERSIONED_MODELS
+from app.ledger_summary import rebuild_summaries
+from app.party_keys import install_party_triggers
+
+WAREHOUSES = ('Khagaria WH', 'Begusarai WH', 'Samastipur WH', 'Purnea WH', 'Katihar WH')
+COMMODITIES = ('Maize', 'Wheat', 'Paddy')
+QUALITIES = ('A', 'B', 'C')
+INSERT_BATCH = 5000
+
+
+# -------------------
+# Row Builders
+# -------------------
+
+def _party_rows(prefix, mobile_prefix, count, offset):
+    return [
+        {'id': offset + i, 'name': f"{prefix} {offset + i:05d}",
+         'mobile': f"{mobile_prefix}{offset + i:09d}", 'address': 'Bihar'}
+        for i in range(count)
+    ]
+
+
+def _row_counts(rng, count, rows, skew):
+    # Zipf-like: the k-th busiest party gets ~1/k**skew of the volume; the mean stays ``rows``
+    if count == 0 or skew <= 0:
+        return [rows] * count
+    weights = [1 / rank ** skew for rank in range(1, count + 1)]
+    scale = rows * count / sum(weights)
+    counts = [max(1, round(weight * scale)) for weight in weights]
+    rng.shuffle(counts)
+    return counts
+
+
+def _day(rng, start, days):
+    return start + timedelta(days=rng.randrange(days))
+
+
+def _seller_ledgers(rng, seller, rows, start, days):
+    purchases, payments = [], []
+    total = 0
+    for n in range(rows):
+        qty = rng.randrange(2000, 30000)
+        reduction = round(qty * rng.uniform(0, 0.02), 2)
+        net_qty = qty - reduction
+        rate = round(rng.uniform(18, 28), 2)
+        cost = round(net_qty * rate, 2)
+        handling = round(net_qty * 0.1, 2)
+        total += cost - handling
+        purchases.append({
+            'date': _day(rng, start, days), 'rst_no': f"P{seller['id']}-{n}",
+            'warehouse': rng.choice(WAREHOUSES), 'seller_name': seller['name'], 'seller_id': seller['id'],
+            'mobile': seller['mobile'], 'commodity': rng.choice(COMMODITIES),
+            'quantity': qty, 'reduction': reduction, 'net_qty': net_qty, 'rate': rate,
+            'cost': cost, 'handling': handling, 'net_cost': round(cost - handling, 2),
+            'quality': rng.choice(QUALITIES),
+        })
+    # Roughly 80% of what is owed has been paid, spread over as many payments
+    for n in range(rows):
+        payments.append({
+            'date': _day(rng, start, days), 'seller_name': seller['name'], 'seller_id': seller['id'],
+            'warehouse': rng.choice(WAREHOUSES), 'commodity': rng.choice(COMMODITIES),
+            'banking_name': seller['name'], 'account_number': f"{seller['id']:012d}", 'ifsc': 'SBIN0000001',
+            'amount_paid': round(total * 0.8 / rows, 2), 'bank_reference': f"UTR{seller['id']}{n:04d}",
+        })
+    return purchases, payments
+
+
+def _stockist_ledgers(rng, stockist, rows, start, days):
+    stock, exits, loans, margins = [], [], [], []
+    for n in range(rows):
+        wh, com = rng.choice(WAREHOUSES), rng.choice(COMMODITIES)
+        qty = rng.randrange(5000, 50000)
+        day = _day(rng, start, days)
+        stock.append({
+            'date': day, 'rst_no': f"S{stockist['id']}-{n}", 'warehouse': wh,
+            'stockist_name': stockist['name'], 'stockist_id': stockist['id'], 'mobile': stockist['mobile'],
+            'commodity': com, 'quantity': qty, 'reduction': 0, 'net_qty': qty,
+            'quality': rng.choice(QUALITIES), 'kind_of_stock': 'self',
+        })
+        if rng.random() < 0.3:
+            out = round(qty * rng.uniform(0.2, 0.8))
+            exits.append({
+                'date': day + timedelta(days=rng.randrange(1, 60)), 'warehouse': wh,
+                'stockist_name': stockist['name'], 'stockist_id': stockist['id'], 'mobile': stockist['mobile'],
+                'commodity': com, 'quantity': out, 'reduction': 0, 'net_qty': out,
+                'rate': 0, 'cost': 0, 'handling': 0, 'net_cost': 0,
+            })
+        if rng.random() < 0.5:
+            amount = round(qty * rng.uniform(10, 15), 2)
+            loans.append({
+                'date': day + timedelta(days=rng.randrange(0, 10)), 'stockist_name': stockist['name'],
+                'stockist_id': stockist['id'], 'warehouse': wh, 'commodity': com,
+                'loan_type': rng.choice(('Cash', 'Margin')), 'amount': amount,
+            })
+            if rng.random() < 0.5:
+                margins.append({
+                    'date': day + timedelta(days=rng.randrange(10, 90)), 'stockist_name': stockist['name'],
+                    'stockist_id': stockist['id'], 'warehouse': wh, 'commodity': com,
+                    'amount': round(amount * rng.uniform(0.1, 0.3), 2),
+                })
+    return stock, exits, loans, margins
+
+
+# -------------------
+# Generator
+# -------------------
+
+def generate(sellers=1000, stockists=1000, rows=20, skew=0.0, overlap=0.0, seed=1,
+             start=date(2024, 4, 1), days=365):
+    """Append synthetic sellers, stockists and their ledgers to the app's DB.
+
+    ``rows`` is the mean number of purchases/payments per seller and stock
+    receipts per stockist; ``skew`` > 0 concentrates them on a few heavy
+    parties (1.0 is Zipf). ``overlap`` is the fraction of stockists who are
+    also sellers (same name and mobile). The same arguments always produce
+    the same data. Returns {table_name: rows inserted}.
+    """
+    rng = random.Random(seed)
+    db.create_all()
+    # New tables get their triggers from create_all(); existing ones may predate them
+    install_party_triggers(db.session.connection())
+    seller_offset = (db.session.query(db.func.max(Seller.id)).scalar() or 0) + 1
+    stockist_offset = (db.session.query(db.func.max(Stockist.id)).scalar() or 0) + 1
+    seller_rows = _party_rows('Seller', '7', sellers, seller_offset)
+    stockist_rows = _party_rows('Stockist', '8', stockists, stockist_offset)
+    for seller, stockist in zip(seller_rows, stockist_rows[:round(overlap * stockists)]):
+        stockist['name'], stockist['mobile'] = seller['name'], seller['mobile']
+    seller_counts = _row_counts(rng, sellers, rows, skew)
+    stockist_counts = _row_counts(rng, stockists, rows, skew)
+
+    pending = {model: [] for model in (Seller, Stockist, *VERSIONED_MODELS)}
+    pending[Seller], pending[Stockist] = list(seller_rows), list(stockist_rows)
+    counts = {}
+
+    def flush(force=False):
+        for model, batch in pending.items():
+            if batch and (force or len(batch) >= INSERT_BATCH):
+                db.session.execute(model.__table__.insert(), batch)
+                counts[model.__tablename__] = counts.get(model.__tablename__, 0) + len(batch)
+                batch.clear()
+
+    flush(force=True)
+    for seller, count in zip(seller_rows, seller_counts):
+        for model, batch in zip((Purchase, Payment), _seller_ledgers(rng, seller, count, start, days)):
+            pending[model].extend(batch)
+        flush()
+    for stockist, count in zip(stockist_rows, stockist_counts):
+        ledgers = _stockist_ledgers(rng, stockist, count, start, days)
+        for model, batch in zip((StockData, StockExit, LoanData, MarginData), ledgers):
+            pending[model].extend(batch)
+        flush()
+    flush(force=True)
+
+    # Core inserts skip the ORM listeners, so invalidate caches and summaries here
+    bump_versions(db.session.connection(), [model.__tablename__ for model in VERSIONED_MODELS])
+    db.session.commit()
+    rebuild_summaries()
+    return counts
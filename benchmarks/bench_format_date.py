@@ -0,0 +1,63 @@
+"""Old format_date vs the memoized filter on synthetic purchase tables.
+
+    python -m benchmarks.bench_format_date --rows 100000
+
+Dates come from the synthetic data generator (one year of purchases) and are
+timed as date objects, as ISO strings and as 'YYYY-MM-DD HH:MM:SS' strings,
+the three shapes the ledger tables have held.
+"""
+import random
+import time
+from datetime import date
+import click
+from benchmarks.legacy import format_date as old_format_date
+from app import format_date, _format_date
+from app.synthetic import _seller_ledgers
+
+
+def purchase_dates(rows, rows_per_seller=20, seed=1):
+    rng = random.Random(seed)
+    dates = []
+    seller_id = 0
+    while len(dates) < rows:
+        seller_id += 1
+        seller = {'id': seller_id, 'name': f'Seller {seller_id:05d}', 'mobile': f'7{seller_id:09d}'}
+        purchases, _ = _seller_ledgers(rng, seller, rows_per_seller, date(2024, 4, 1), 365)
+        dates.extend(p['date'] for p in purchases)
+    return dates[:rows]
+
+
+def timed(fn, values, repeat, before=None):
+    best = None
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        out = [fn(v) for v in values]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, out
+
+
+@click.command()
+@click.option('--rows', default=100_000, show_default=True, help='Purchase rows to format.')
+@click.option('--repeat', default=3, show_default=True, help='Runs per implementation; the best is reported.')
+def main(rows, repeat):
+    dates = purchase_dates(rows)
+    shapes = (('date objects', dates),
+              ('ISO strings', [d.isoformat() for d in dates]),
+              ('datetime strings', [f'{d.isoformat()} 00:00:00' for d in dates]))
+    uncached = _format_date.__wrapped__
+    for label, values in shapes:
+        old_s, old = timed(old_format_date, values, repeat)
+        # Cold: the memo starts empty, as after a restart; repeats within the table still hit
+        new_s, new = timed(format_date, values, repeat, before=_format_date.cache_clear)
+        raw_s, raw = timed(uncached, values, repeat)
+        click.echo(f"{label:<17} old {old_s:.3f} s, new {new_s:.3f} s (uncached {raw_s:.3f} s)")
+        if new != old or raw != old:
+            raise click.ClickException(f"output differs from the old format_date on {label}")
+    click.echo(f"outputs identical ({len({d for d in dates})} distinct dates in {rows} rows)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Old format_inr vs the memoized scalar and column formatters on 100k amounts.
+
+    python -m benchmarks.bench_format_inr --values 100000
+"""
+import random
+import time
+import click
+from benchmarks.legacy import format_inr as old_format_inr
+from app import format_inr, format_inr_many, _group_inr
+
+
+def amounts(count, distinct=None, seed=1):
+    """``count`` signed amounts up to ~1e9; drawn from ``distinct`` values when given."""
+    rng = random.Random(seed)
+
+    def one():
+        return round(rng.choice((1, -1)) * 10 ** rng.uniform(0, 9), rng.choice((0, 2)))
+
+    if distinct is None:
+        return [one() for _ in range(count)]
+    pool = [one() for _ in range(distinct)]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def timed(fn, values, repeat):
+    best = None
+    for _ in range(repeat):
+        _group_inr.cache_clear()
+        start = time.perf_counter()
+        out = fn(values)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, out
+
+
+@click.command()
+@click.option('--values', 'count', default=100_000, show_default=True)
+@click.option('--repeat', default=3, show_default=True, help='Runs per implementation; the best is reported.')
+def main(count, repeat):
+    for label, values in (('unique amounts', amounts(count)),
+                          ('repeated (2k set)', amounts(count, distinct=2000))):
+        old_s, old = timed(lambda vs: [old_format_inr(v) for v in vs], values, repeat)
+        scalar_s, scalar = timed(lambda vs: [format_inr(v) for v in vs], values, repeat)
+        column_s, column = timed(lambda vs: list(format_inr_many(vs)), values, repeat)
+        click.echo(f"{label:<18} old {old_s:.3f} s, scalar {scalar_s:.3f} s, column {column_s:.3f} s")
+        # Byte-identical, not just equal-looking
+        expected = [s.encode() for s in old]
+        for name, out in (('scalar', scalar), ('column', column)):
+            if [s.encode() for s in out] != expected:
+                raise click.ClickException(f"{name} output differs from the old format_inr on {label}")
+    click.echo("outputs byte-identical")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Old str.replace chain vs the single-scan _phonetic_word on random names.
+
+    python -m benchmarks.bench_phonetic --names 100000
+"""
+import random
+import string
+import time
+import click
+from benchmarks.legacy import phonetic_word as old_phonetic_word
+from utils.hindi import _phonetic_word
+
+SYLLABLES = ('ra', 'am', 'sh', 'kum', 'ar', 'bh', 'aa', 'ee', 'chh', 'ch', 'th', 'dh', 'kh',
+             'gh', 'ph', 'wh', 'qu', 'au', 'ai', 'oo', 'an', 'deep', 'pr', 'sun', 'il', 'ya')
+
+
+def random_names(count, seed=1):
+    rng = random.Random(seed)
+    names = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            names.append(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))))
+        else:
+            names.append(''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 12))))
+    return names
+
+
+def timed(fn, names, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = [fn(name) for name in names]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, out
+
+
+@click.command()
+@click.option('--names', 'count', default=100_000, show_default=True, help='Random lowercase names.')
+@click.option('--repeat', default=3, show_default=True, help='Runs per implementation; the best is reported.')
+@click.option('--seed', default=1, show_default=True)
+def main(count, repeat, seed):
+    names = random_names(count, seed)
+    old_s, old = timed(old_phonetic_word, names, repeat)
+    new_s, new = timed(_phonetic_word, names, repeat)
+    mismatches = [name for name, a, b in zip(names, old, new) if a != b]
+    click.echo(f"{count} names: old {old_s:.3f} s, new {new_s:.3f} s ({old_s / new_s:.1f}x)")
+    if mismatches:
+        raise click.ClickException(f"{len(mismatches)} outputs differ, e.g. {mismatches[:5]}")
+    click.echo("outputs identical")
+
+
+if __name__ == '__main__':
+    main()
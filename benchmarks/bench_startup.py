@@ -0,0 +1,48 @@
+"""Cold ``import app`` time in fresh interpreters, with per-module cumulative import times.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+import os
+import statistics
+import subprocess
+import sys
+import click
+
+WATCHED = ('app', 'utils.hindi', 'deep_translator', 'flask_sqlalchemy', 'fpdf')
+
+
+def import_once():
+    """(wall seconds, {module: cumulative import µs}) for one ``import app`` in a new process."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    probe = "import time; t = time.perf_counter(); import app; print(time.perf_counter() - t)"
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', probe], cwd=root,
+                          capture_output=True, text=True, check=True)
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cum, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        if cum.isdigit():
+            cumulative[name] = int(cum)
+    return float(proc.stdout.strip().splitlines()[-1]), cumulative
+
+
+@click.command()
+@click.option('--runs', default=5, show_default=True, help='Fresh interpreters to start.')
+def main(runs):
+    walls, modules = [], {name: [] for name in WATCHED}
+    for _ in range(runs):
+        wall, cumulative = import_once()
+        walls.append(wall * 1000)
+        for name in WATCHED:
+            modules[name].append(cumulative.get(name, 0) / 1000)
+    click.echo(f"import app: median {statistics.median(walls):.1f} ms "
+               f"(min {min(walls):.1f}, max {max(walls):.1f}) over {runs} runs")
+    for name, times in modules.items():
+        label = f"{statistics.median(times):.1f} ms" if any(times) else "not imported"
+        click.echo(f"  {name:<18} {label}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Pre-optimisation versions of hot helpers, kept verbatim as parity and speed baselines."""
+from datetime import datetime
+
+
+# -------------------
+# app (Jinja filters)
+# -------------------
+
+def format_inr(value):
+    # format_inr before memoized grouping
+    try:
+        value = float(value or 0)
+        s = f"{value:.2f}"
+        int_part, dec_part = s.split('.')
+
+        if len(int_part) <= 3:
+            return f"₹{int_part}.{dec_part}"
+
+        # Grouping digits for Indian format
+        last_three = int_part[-3:]
+        rest = int_part[:-3]
+        rest = ','.join([rest[max(i - 2, 0):i] for i in range(len(rest), 0, -2)][::-1]).lstrip(',')
+
+        formatted = f"{rest},{last_three}" if rest else last_three
+        return f"₹{formatted}.{dec_part}"
+    except Exception:
+        return "₹0.00"
+
+
+def format_date(value):
+    # format_date before memoization and the fromisoformat fast path
+    try:
+        if hasattr(value, "strftime"):
+            return value.strftime('%d-%m-%Y')
+        elif isinstance(value, str):
+            try:
+                dt = datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                dt = datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+            return dt.strftime('%d-%m-%Y')
+        else:
+            return value
+    except:
+        return value
+
+
+# -------------------
+# utils.hindi
+# -------------------
+
+def phonetic_word(w: str) -> str:
+    # _phonetic_word before the single-scan rewrite: one str.replace pass per pattern
+    t = w
+    # common digraphs
+    for a, b in [
+        ("sh", "श"), ("chh", "छ"), ("ch", "च"),
+        ("kh", "ख"), ("gh", "घ"), ("th", "थ"), ("dh", "ध"),
+        ("ph", "फ"), ("bh", "भ"), ("wh", "व"), ("qu", "क्व"),
+    ]:
+        t = t.replace(a, b)
+
+    # quick vowel groups
+    for a, b in [("aa", "आ"), ("ee", "ई"), ("oo", "ऊ"), ("ai", "ऐ"), ("au", "औ")]:
+        t = t.replace(a, b)
+
+    # singles (rough)
+    t = (t.replace("a", "अ").replace("e", "ए").replace("i", "इ")
+           .replace("o", "ओ").replace("u", "उ"))
+
+    # consonants
+    cons = {
+        "k":"क","g":"ग","c":"क","j":"ज","t":"त","d":"द","n":"न",
+        "p":"प","b":"ब","m":"म","y":"य","r":"र","l":"ल","v":"व","w":"व",
+        "s":"स","h":"ह","q":"क","x":"क्स","z":"ज़","f":"फ",
+    }
+    return "".join(cons.get(ch, ch) for ch in t)
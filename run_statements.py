@@ -0,0 +1,109 @@
+"""Month-end PDF statements for every seller and stockist.
+
+    python run_statements.py --workers 4
+    python run_statements.py --benchmark 10000    # throwaway synthetic DB of 10k parties
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+import click
+
+_app = None
+
+
+# -------------------
+# Worker Process
+# -------------------
+
+def _init_worker():
+    global _app
+    from app import create_app
+    _app = create_app()
+
+
+def _run_chunk(role, party_ids, out_dir, today):
+    from app.statements import subset_font, write_batch
+
+    with _app.app_context():
+        store = _app.extensions['statements']
+        font = subset_font(store.font_path, store.directory) if store.font_path else None
+        return write_batch(role, party_ids, out_dir, today, font, store.use_summary)
+
+
+# -------------------
+# Driver
+# -------------------
+
+def party_chunks(roles, chunk_size):
+    """[(role, [party ids])] covering every party of ``roles``, ids ascending."""
+    from app import create_app, db
+    from app.models import Seller, Stockist
+
+    app = create_app()
+    chunks = []
+    with app.app_context():
+        for role in roles:
+            party = Seller if role == 'seller' else Stockist
+            ids = [party_id for (party_id,) in db.session.query(party.id).order_by(party.id)]
+            chunks += [(role, ids[i:i + chunk_size]) for i in range(0, len(ids), chunk_size)]
+        db.engine.dispose()  # forked workers open their own connections
+    return chunks
+
+
+def run(roles, out_dir, workers, chunk_size):
+    today = date.today()
+    os.makedirs(out_dir, exist_ok=True)
+    chunks = party_chunks(roles, chunk_size)
+    total = sum(len(ids) for _, ids in chunks)
+    written = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(_run_chunk, role, ids, out_dir, today) for role, ids in chunks]
+        with click.progressbar(length=total, label='Statements', show_pos=True) as bar:
+            for future in as_completed(futures):
+                count, size = future.result()
+                written += size
+                bar.update(count)
+
+    elapsed = time.perf_counter() - start
+    click.echo(f"{total:,} statements, {written / 1e6:,.1f} MB in {elapsed:,.1f}s "
+               f"({total / elapsed if elapsed else 0:,.1f}/s) -> {out_dir}")
+    return total, elapsed
+
+
+@click.command()
+@click.option('--role', type=click.Choice(['seller', 'stockist', 'all']), default='all', show_default=True)
+@click.option('--out', 'out_dir', help='Output directory (default instance/statements/YYYY-MM).')
+@click.option('--workers', default=os.cpu_count(), show_default=True, help='Worker processes.')
+@click.option('--chunk-size', default=200, show_default=True, help='Parties per worker task.')
+@click.option('--benchmark', 'benchmark_users', type=int,
+              help='Run against a fresh synthetic DB with this many parties (half sellers).')
+@click.option('--rows', default=20, show_default=True, help='Ledger rows per party for --benchmark.')
+def main(role, out_dir, workers, chunk_size, benchmark_users, rows):
+    roles = ['seller', 'stockist'] if role == 'all' else [role]
+
+    if benchmark_users:
+        scratch = tempfile.mkdtemp(prefix='statements-bench-')
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(scratch, 'warehouse.db')
+        os.environ['STATEMENT_DIR'] = os.path.join(scratch, 'cache')
+        out_dir = out_dir or os.path.join(scratch, 'out')
+
+        from app import create_app
+        from app.synthetic import generate
+        start = time.perf_counter()
+        with create_app().app_context():
+            counts = generate(sellers=benchmark_users // 2, stockists=benchmark_users - benchmark_users // 2,
+                              rows=rows)
+        click.echo(f"Synthetic DB in {time.perf_counter() - start:,.1f}s: "
+                   + ', '.join(f"{table}={count:,}" for table, count in counts.items()))
+
+    out_dir = out_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'statements',
+                                      date.today().strftime('%Y-%m'))
+    run(roles, out_dir, workers, chunk_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+import os
+import sqlite3
+import tempfile
+from datetime import date, timedelta
+import pytest
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+# The Hindi store is opened once per process, so point it somewhere disposable up front
+os.environ.setdefault('HINDI_CACHE_PATH', os.path.join(tempfile.mkdtemp(prefix='hindi-'), 'hindi.db'))
+# Tests that want the startup warm-up turn it back on explicitly
+os.environ.setdefault('HINDI_WARM_ON_START', '0')
+
+
+@pytest.fixture(autouse=True)
+def offline_translator():
+    # Never reach the network from tests; unknown words use the phonetic fallback
+    from utils.hindi import set_translator
+    set_translator(None)
+    yield
+    set_translator(None)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'warehouse.db'}")
+    monkeypatch.setenv('STATEMENT_DIR', str(tmp_path / 'statements'))
+    from app import create_app, db
+
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def legacy_app(tmp_path, monkeypatch):
+    """App on a DB with the pre-migration schema (no party id columns, VARCHAR purchase.date)."""
+    path = tmp_path / 'legacy.db'
+    with sqlite3.connect(path) as conn, open(os.path.join(DATA_DIR, 'legacy_schema.sql')) as fh:
+        conn.executescript(fh.read())
+    conn.close()
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{path}")
+    monkeypatch.setenv('STATEMENT_DIR', str(tmp_path / 'statements'))
+    from app import create_app, db
+
+    app = create_app()
+    app.config['TESTING'] = True
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def ledgers(app):
+    """One seller and one stockist (sharing a mobile) with a few rows in every ledger."""
+    from app import db
+    from app.models import Seller, Stockist, Purchase, Payment, StockData, StockExit, LoanData, MarginData
+
+    with app.app_context():
+        seller = Seller(name='Ram Kumar', mobile='9000000001')
+        stockist = Stockist(name='Ram Kumar', mobile='9000000001')
+        db.session.add_all([seller, stockist, Seller(name='Other', mobile='9000000002')])
+        start = date(2024, 4, 1)
+        for i in range(6):
+            day = start + timedelta(days=7 * i)
+            wh, com = f'WH{i % 2}', ('Wheat', 'Maize')[i % 2]
+            db.session.add_all([
+                Purchase(date=day, rst_no=f'P{i}', warehouse=wh, seller_name='Ram Kumar', mobile='9000000001',
+                         commodity=com, quantity=1000, reduction=10, net_qty=990, rate=20,
+                         cost=19800, handling=99, net_cost=19701, quality='A'),
+                Payment(date=day, seller_name='Ram Kumar', warehouse=wh, commodity=com, banking_name='Ram',
+                        account_number='1', ifsc='SBIN0000001', amount_paid=15000, bank_reference=f'UTR{i}'),
+                StockData(date=day, rst_no=f'S{i}', warehouse=wh, stockist_name='Ram Kumar', commodity=com,
+                          quantity=5000, quality='A'),
+                StockExit(date=day + timedelta(days=3), warehouse=wh, stockist_name='Ram Kumar', commodity=com,
+                          quantity=1000, reduction=0, net_qty=1000, rate=0, cost=0, handling=0, net_cost=0),
+                LoanData(date=day, stockist_name='Ram Kumar', warehouse=wh, commodity=com,
+                         loan_type=('Cash', 'Margin')[i % 2], amount=50000),
+                MarginData(date=day + timedelta(days=5), stockist_name='Ram Kumar', warehouse=wh,
+                           commodity=com, amount=5000),
+            ])
+        db.session.commit()
+        return {'seller_id': seller.id, 'stockist_id': stockist.id, 'mobile': seller.mobile}
+
+
+@pytest.fixture
+def client(app, ledgers):
+    """Test client logged in as the seller/stockist from ``ledgers``."""
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['mobile'] = ledgers['mobile']
+    return client
@@ -0,0 +1,120 @@
+-- Ledger and party tables as they were before seller_id/stockist_id and DATE purchase.date
+CREATE TABLE seller (
+	id INTEGER NOT NULL, 
+	name VARCHAR(100), 
+	mobile VARCHAR(15), 
+	address VARCHAR(200), 
+	banking_name VARCHAR(100), 
+	account_number VARCHAR(30), 
+	ifsc_code VARCHAR(20), 
+	bank_name VARCHAR(100), 
+	PRIMARY KEY (id), 
+	UNIQUE (mobile)
+);
+
+CREATE TABLE payment (
+	id INTEGER NOT NULL, 
+	date DATE NOT NULL, 
+	seller_name VARCHAR(100) NOT NULL, 
+	warehouse VARCHAR(100) NOT NULL, 
+	commodity VARCHAR(50) NOT NULL, 
+	banking_name VARCHAR(100) NOT NULL, 
+	account_number VARCHAR(30) NOT NULL, 
+	ifsc VARCHAR(20) NOT NULL, 
+	amount_paid FLOAT NOT NULL, 
+	bank_reference VARCHAR(100) NOT NULL, 
+	PRIMARY KEY (id)
+);
+
+CREATE TABLE purchase (
+	id INTEGER NOT NULL, 
+	date VARCHAR(20), 
+	rst_no VARCHAR(50), 
+	warehouse VARCHAR(100), 
+	seller_name VARCHAR(100), 
+	mobile VARCHAR(20), 
+	commodity VARCHAR(50), 
+	quantity FLOAT, 
+	reduction FLOAT, 
+	net_qty FLOAT, 
+	rate FLOAT, 
+	cost FLOAT, 
+	handling FLOAT, 
+	net_cost FLOAT, 
+	quality VARCHAR(20), 
+	PRIMARY KEY (id), 
+	CONSTRAINT uix_rstno_warehouse UNIQUE (rst_no, warehouse)
+);
+
+CREATE TABLE stockist (
+	id INTEGER NOT NULL, 
+	name VARCHAR(100), 
+	mobile VARCHAR(15), 
+	address VARCHAR(200), 
+	banking_name VARCHAR(100), 
+	account_number VARCHAR(30), 
+	ifsc_code VARCHAR(20), 
+	bank_name VARCHAR(100), 
+	PRIMARY KEY (id), 
+	UNIQUE (mobile)
+);
+
+CREATE TABLE stock_data (
+	id INTEGER NOT NULL, 
+	date DATE NOT NULL, 
+	rst_no VARCHAR(50) NOT NULL, 
+	warehouse VARCHAR(120) NOT NULL, 
+	stockist_name VARCHAR(120) NOT NULL, 
+	mobile VARCHAR(20), 
+	commodity VARCHAR(50), 
+	quantity FLOAT, 
+	reduction FLOAT, 
+	net_qty FLOAT, 
+	rate FLOAT, 
+	cost FLOAT, 
+	handling FLOAT, 
+	net_cost FLOAT, 
+	quality VARCHAR(40), 
+	kind_of_stock VARCHAR(20), 
+	PRIMARY KEY (id)
+);
+
+CREATE TABLE stock_exit (
+	id INTEGER NOT NULL, 
+	date DATE NOT NULL, 
+	warehouse VARCHAR(100) NOT NULL, 
+	stockist_name VARCHAR(100) NOT NULL, 
+	mobile VARCHAR(20), 
+	commodity VARCHAR(30) NOT NULL, 
+	quantity FLOAT NOT NULL, 
+	reduction FLOAT NOT NULL, 
+	net_qty FLOAT NOT NULL, 
+	rate FLOAT NOT NULL, 
+	cost FLOAT NOT NULL, 
+	handling FLOAT NOT NULL, 
+	net_cost FLOAT NOT NULL, 
+	quality VARCHAR(30), 
+	PRIMARY KEY (id)
+);
+
+CREATE TABLE loan_data (
+	id INTEGER NOT NULL, 
+	date DATE NOT NULL, 
+	stockist_name VARCHAR(100) NOT NULL, 
+	warehouse VARCHAR(100), 
+	commodity VARCHAR(30), 
+	loan_type VARCHAR(30), 
+	amount FLOAT NOT NULL, 
+	PRIMARY KEY (id)
+);
+
+CREATE TABLE margin_data (
+	id INTEGER NOT NULL, 
+	date DATE NOT NULL, 
+	stockist_name VARCHAR(100) NOT NULL, 
+	warehouse VARCHAR(100) NOT NULL, 
+	commodity VARCHAR(20) NOT NULL, 
+	amount FLOAT NOT NULL, 
+	PRIMARY KEY (id)
+);
+
@@ -0,0 +1,109 @@
+from datetime import date
+import pytest
+
+
+def _purchase(models):
+    return models.Purchase(date=date(2024, 9, 1), rst_no='NEW', warehouse='WH0', seller_name='Ram Kumar',
+                           mobile='9000000001', commodity='Wheat', quantity=100, reduction=0, net_qty=100,
+                           rate=20, cost=2000, handling=0, net_cost=2000, quality='A')
+
+
+def _payment(models):
+    return models.Payment(date=date(2024, 9, 1), seller_name='Ram Kumar', warehouse='WH0', commodity='Wheat',
+                          banking_name='Ram', account_number='1', ifsc='SBIN0000001', amount_paid=100,
+                          bank_reference='UTR-NEW')
+
+
+def _stock(models):
+    return models.StockData(date=date(2024, 9, 1), rst_no='S-NEW', warehouse='WH0', stockist_name='Ram Kumar',
+                            commodity='Wheat', quantity=700, quality='A')
+
+
+INSERTS = [
+    ('/user/seller', _purchase, 'purchase'),
+    ('/user/seller', _payment, 'payment'),
+    ('/user/stockist', _stock, 'stock_data'),
+]
+
+
+@pytest.mark.parametrize('path, make_row, table', INSERTS, ids=[table for _, _, table in INSERTS])
+def test_insert_invalidates_etag(app, client, path, make_row, table):
+    from app import db, models
+
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+
+    assert client.get(path, headers={'If-None-Match': etag}).status_code == 304
+
+    with app.app_context():
+        db.session.add(make_row(models))
+        db.session.commit()
+
+    after = client.get(path, headers={'If-None-Match': etag})
+    assert after.status_code == 200
+    assert after.headers['ETag'] != etag
+    assert client.get(path, headers={'If-None-Match': after.headers['ETag']}).status_code == 304
+
+
+def test_insert_outside_the_orm_invalidates_etag(app, client):
+    # No LedgerVersion bump here: the ledger fingerprint alone has to catch it
+    from app import db
+
+    etag = client.get('/user/seller').headers['ETag']
+    with app.app_context():
+        db.session.execute(db.text(
+            "INSERT INTO payment (date, seller_name, warehouse, commodity, banking_name, account_number, "
+            "ifsc, amount_paid, bank_reference) VALUES ('2024-09-02', 'Ram Kumar', 'WH0', 'Wheat', 'Ram', "
+            "'1', 'SBIN0000001', 50, 'UTR-RAW')"))
+        db.session.commit()
+    assert client.get('/user/seller', headers={'If-None-Match': etag}).status_code == 200
+
+
+@pytest.mark.parametrize('path, make_row, table', INSERTS, ids=[table for _, _, table in INSERTS])
+def test_insert_bumps_only_its_ledger_version(app, ledgers, path, make_row, table):
+    from app import db, models
+    from app.fragment_cache import ledger_versions
+
+    with app.app_context():
+        before = ledger_versions()
+        db.session.add(make_row(models))
+        db.session.commit()
+        after = ledger_versions()
+
+    assert after[table] == before[table] + 1
+    assert {name: v for name, v in after.items() if name != table} == \
+        {name: v for name, v in before.items() if name != table}
+
+
+def test_rolled_back_insert_keeps_etag(app, client):
+    from app import db, models
+
+    etag = client.get('/user/seller').headers['ETag']
+    with app.app_context():
+        db.session.add(_purchase(models))
+        db.session.flush()
+        db.session.rollback()
+    assert client.get('/user/seller', headers={'If-None-Match': etag}).status_code == 304
+
+
+@pytest.mark.parametrize('path, statement', [
+    ('/user/seller', "UPDATE purchase SET rate = 25, net_cost = 24000 WHERE rst_no = 'P0'"),
+    ('/user/seller', "UPDATE payment SET amount_paid = 14000 WHERE bank_reference = 'UTR0'"),
+    ('/user/stockist', "UPDATE stock_data SET quantity = 4500 WHERE rst_no = 'S0'"),
+], ids=['purchase', 'payment', 'stock_data'])
+def test_edit_by_another_writer_invalidates_etag_and_fragments(app, client, path, statement):
+    # Row count and max id stay put; only the trigger-bumped ledger version changes
+    from app import db
+
+    first = client.get(path)
+    etag = first.headers['ETag']
+    with app.app_context():
+        db.session.execute(db.text(statement))
+        db.session.commit()
+
+    after = client.get(path, headers={'If-None-Match': etag})
+    assert after.status_code == 200
+    assert after.headers['ETag'] != etag
+    assert after.get_data() != first.get_data()  # sections re-rendered, not served from the fragment cache
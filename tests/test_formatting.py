@@ -0,0 +1,55 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+from types import SimpleNamespace
+import pytest
+from benchmarks import legacy
+
+AMOUNTS = [None, '', 'abc', 0, 0.0, -0.0, 1, True, False, 5.005, 999.994, 999.995, 1000, -1000,
+           12345.678, -12345.678, 1234567.891, 10 ** 12, 1e20, -1e20, float('nan'), float('inf'),
+           float('-inf'), '2500.5', Decimal('99999.99'), Decimal('-1.5'), [1]]
+
+DATES = [
+    '2024-09-01', '2024-02-29', '0999-01-01',                        # ISO dates
+    '2024-09-01 13:45:10', '2024-09-01 00:00:00',                    # ISO datetimes
+    date(2024, 9, 1), datetime(2024, 9, 1, 13, 45, 10), date(999, 1, 1),
+    None, '', 'garbage', 'not-a-date', '01-09-2024', '2024/09/01',   # missing or garbage
+    '2024-9-1', '2024-02-30', '2024-09-01 24:00:00', '2024-09-01T13:45:10',
+    '2024-09-01 13:45:10.5', '2024-09-01 ', ' 2024-09-01', '2024-13-01 00:00:00',
+    0, 20240901, 1.5, time(13, 45), ['2024-09-01'], b'2024-09-01',
+]
+
+
+def test_format_date_matches_old_filter():
+    from app import format_date, _format_date
+
+    expected = [legacy.format_date(value) for value in DATES]
+    _format_date.cache_clear()
+    assert [format_date(value) for value in DATES] == expected
+    assert [format_date(value) for value in DATES] == expected  # memoized second pass
+
+
+def test_format_inr_matches_old_filter():
+    from app import format_inr, format_inr_many
+
+    expected = [legacy.format_inr(value) for value in AMOUNTS]
+    assert [format_inr(value) for value in AMOUNTS] == expected
+    assert list(format_inr_many(AMOUNTS)) == expected
+    assert list(format_inr_many(AMOUNTS + AMOUNTS)) == expected + expected
+
+
+def test_with_inr_pairs_rows_lazily():
+    from app import with_inr
+
+    rows = (SimpleNamespace(amount=amount) for amount in (1500, 250000.5, 1500))
+    pairs = with_inr(rows, 'amount')
+    row, amount = next(pairs)
+    assert (row.amount, amount) == (1500, '₹1,500.00')
+    assert [amount for _, amount in pairs] == ['₹2,50,000.50', '₹1,500.00']
+
+
+@pytest.mark.parametrize('stream_rows', [0, 1])
+def test_stockist_tables_show_formatted_amounts(app, client, stream_rows):
+    app.config['STREAM_HISTORY_ROWS'] = stream_rows  # 1 forces the streamed page
+    body = client.get('/user/stockist').get_data(as_text=True)
+    assert '<td>₹50,000.00</td>' in body   # loans
+    assert '<td>₹5,000.00</td>' in body    # margins
@@ -0,0 +1,143 @@
+import os
+
+GOLDEN = os.path.join(os.path.dirname(__file__), 'data', 'phonetic_golden.tsv')
+
+
+def _golden():
+    with open(GOLDEN, encoding='utf-8') as fh:
+        return [line.rstrip('\n').split('\t') for line in fh if not line.startswith('#')]
+
+
+def test_phonetic_word_matches_frozen_corpus():
+    from utils.hindi import _phonetic_word
+
+    corpus = _golden()
+    assert len(corpus) > 2000
+    mismatches = [(word, expected, _phonetic_word(word)) for word, expected in corpus
+                  if _phonetic_word(word) != expected]
+    assert not mismatches, mismatches[:10]
+
+
+
+class _HungBackend:
+    """Blocks every call until released, like a translator whose request never returns."""
+
+    def __init__(self):
+        import threading
+        self.release = threading.Event()
+
+    def translate_batch(self, words):
+        self.release.wait(5)
+        return ["हिंदी"] * len(words)
+
+
+def test_hung_translator_times_out_and_opens_breaker(monkeypatch):
+    import time
+    from utils.hindi import breaker, set_translator, to_hindi_batch, _phonetic_word
+
+    backend = _HungBackend()
+    set_translator(backend)
+    monkeypatch.setattr(breaker, 'slow_call', 0.05)
+    try:
+        start = time.monotonic()
+        for n in range(breaker.max_failures):
+            word = 'zorbax' + 'q' * n  # a fresh word each time, so the store never answers
+            assert to_hindi_batch([word]) == {word: _phonetic_word(word)}
+        assert time.monotonic() - start < 2
+        assert breaker.is_open
+    finally:
+        backend.release.set()
+
+
+class _OneRequestPerText:
+    """Mimics GoogleTranslator: translate() is one request and translate_batch loops over it."""
+
+    def __init__(self, mapping, drop_line=False):
+        self.mapping = mapping
+        self.drop_line = drop_line
+        self.requests = 0
+
+    def translate(self, text):
+        self.requests += 1
+        lines = [self.mapping.get(line, line) for line in text.split("\n")]
+        return "\n".join(lines[:-1] if self.drop_line else lines)
+
+    def translate_batch(self, batch):
+        return [self.translate(text) for text in batch]
+
+
+def test_page_of_names_is_one_translator_request():
+    from utils.hindi import NewlineBatchBackend, set_translator, to_hindi_batch
+
+    google = _OneRequestPerText({'Quillon': 'क्विलॉन', 'Vextra': 'वेक्स्ट्रा', 'Zomby': 'ज़ॉम्बी'})
+    set_translator(NewlineBatchBackend(google))
+    out = to_hindi_batch(['Quillon Vextra', 'Zomby', 'Quillon'])
+    assert google.requests == 1
+    assert out == {'Quillon Vextra': 'क्विलॉन वेक्स्ट्रा', 'Zomby': 'ज़ॉम्बी', 'Quillon': 'क्विलॉन'}
+
+
+def test_newline_batches_split_at_the_length_limit_and_drop_misaligned_replies():
+    from utils.hindi import NewlineBatchBackend
+
+    words = [f'w{n:04d}' for n in range(2000)]  # 6 chars each with the newline
+    google = _OneRequestPerText({})
+    assert NewlineBatchBackend(google).translate_batch(words) == words
+    assert google.requests == 3
+
+    google = _OneRequestPerText({'Alpha': 'अल्फा'}, drop_line=True)
+    assert NewlineBatchBackend(google).translate_batch(['Alpha', 'Beta']) == ['', '']
+
+
+class _BatchOnly:
+    def translate_batch(self, words):
+        return ["" for _ in words]
+
+
+def test_single_lookup_on_batch_only_backend_falls_back():
+    from utils.hindi import breaker, set_translator, to_hindi_name, _phonetic_word
+
+    set_translator(_BatchOnly())
+    for word in ('Zorblax', 'Zorblaxa', 'Zorblaxe', 'Zorblaxi'):
+        assert to_hindi_name(word) == _phonetic_word(word.lower())
+    assert breaker.failures == 0 and not breaker.is_open
+
+
+def test_static_backend_serves_single_and_batch_lookups():
+    from utils.hindi import StaticBackend, set_translator, to_hindi_name, to_hindi_batch
+
+    set_translator(StaticBackend({'Quorvin': 'क्वॉर्विन', 'Plimsy': 'प्लिम्सी'}))
+    assert to_hindi_name('Quorvin') == 'क्वॉर्विन'
+    assert to_hindi_batch(['Plimsy']) == {'Plimsy': 'प्लिम्सी'}
+
+
+LEDGER_WORDS = {'Ram': 'राम', 'Kumar': 'कुमार', 'Other': 'अदर', 'WH': 'डब्ल्यूएच', 'Cash': 'कैश', 'Margin': 'मार्जिन'}
+
+
+def test_create_app_warms_the_store_in_the_background(app, ledgers, monkeypatch):
+    import threading
+    from app import create_app
+    from utils.hindi import StaticBackend, get_store, set_translator
+
+    set_translator(StaticBackend(LEDGER_WORDS))
+    monkeypatch.setenv('HINDI_WARM_ON_START', '1')
+    create_app()
+    for thread in threading.enumerate():
+        if thread.name == 'hindi-warm':
+            thread.join(5)
+
+    assert get_store().get_many(LEDGER_WORDS) == LEDGER_WORDS
+
+
+def test_warm_up_skips_the_translator_while_the_breaker_is_open(app, ledgers):
+    import time
+    from app.cli import start_hindi_warmup
+    from utils.hindi import StaticBackend, breaker, set_translator
+
+    backend = StaticBackend({'Ram': 'राम'})
+    set_translator(backend)
+    breaker.opened_at = time.monotonic()
+
+    thread = start_hindi_warmup(app)
+    thread.join(5)
+    assert not thread.is_alive()
+    assert backend.calls == 0
@@ -0,0 +1,127 @@
+from datetime import date, timedelta
+import pytest
+
+WAREHOUSES = ('WH0', 'WH1', 'WH2', 'WH3', 'WH4')
+COMMODITIES = ('Wheat', 'Maize', 'Paddy', 'Gram', 'Mustard', 'Lentil', 'Barley', 'Millet')
+TODAY = date(2024, 10, 1)
+
+
+def _stockist_with_pairs(app, pairs, mobile):
+    """A stockist holding ``pairs`` (warehouse, commodity) pairs: two receipts and one exit each."""
+    from app import db
+    from app.models import Stockist, StockData, StockExit
+
+    name = f'Stockist {pairs}'
+    with app.app_context():
+        stockist = Stockist(name=name, mobile=mobile)
+        db.session.add(stockist)
+        combos = [(wh, com) for com in COMMODITIES for wh in WAREHOUSES][:pairs]
+        for n, (wh, com) in enumerate(combos):
+            first = date(2024, 4, 1) + timedelta(days=n)
+            db.session.add_all([
+                StockData(date=first, rst_no=f'{mobile}-{n}a', warehouse=wh, stockist_name=name,
+                          commodity=com, quantity=4000, quality='A'),
+                StockData(date=first + timedelta(days=30), rst_no=f'{mobile}-{n}b', warehouse=wh,
+                          stockist_name=name, commodity=com, quantity=2000, quality='A'),
+                StockExit(date=first + timedelta(days=60), warehouse=wh, stockist_name=name, commodity=com,
+                          quantity=1000, reduction=0, net_qty=1000, rate=0, cost=0, handling=0, net_cost=0),
+            ])
+        db.session.commit()
+        return stockist.id
+
+
+def test_rental_due_is_one_query_for_any_number_of_pairs(app):
+    from app import db
+    from app.benchmark import count_queries
+    from app.ledger import RENTAL_RATE, rental_due_for
+
+    few = _stockist_with_pairs(app, 1, '9100000001')
+    many = _stockist_with_pairs(app, 40, '9100000040')
+    with app.app_context():
+        with count_queries(db.engine) as one_pair:
+            due_few = rental_due_for(few, RENTAL_RATE, TODAY)
+        with count_queries(db.engine) as forty_pairs:
+            due_many = rental_due_for(many, RENTAL_RATE, TODAY)
+
+    assert one_pair['queries'] == forty_pairs['queries'] == 1
+    assert sum(len(comms) for comms in due_many.values()) == 40
+    # 5 MT net since 2024-04-01, inclusive of both ends
+    days = (TODAY - date(2024, 4, 1)).days + 1
+    assert due_few == {'WH0': {'Wheat': round(5 * RENTAL_RATE * days, 2)}}
+
+
+@pytest.mark.parametrize('use_summary', [False, True])
+def test_stockist_page_queries_do_not_grow_with_pairs(app, use_summary):
+    from app import db
+    from app.benchmark import count_queries, reset_caches
+    from app.ledger_summary import rebuild_summaries
+
+    app.config['USE_LEDGER_SUMMARY'] = use_summary
+    counts = {}
+    for pairs, mobile in ((1, '9100000001'), (40, '9100000040')):
+        _stockist_with_pairs(app, pairs, mobile)
+    if use_summary:
+        with app.app_context():
+            rebuild_summaries()
+    with app.app_context():
+        engine = db.engine
+
+    for pairs, mobile in ((1, '9100000001'), (40, '9100000040')):
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['mobile'] = mobile
+        reset_caches(app)  # every section renders from the ledgers
+        with count_queries(engine) as counter:
+            assert client.get('/user/stockist').status_code == 200
+        counts[pairs] = counter['queries']
+
+    assert counts[1] == counts[40]
+
+
+def _stock_row(name, rst_no):
+    from app.models import StockData
+    return StockData(date=date(2024, 9, 1), rst_no=rst_no, warehouse='WH0', stockist_name=name,
+                     commodity='Wheat', quantity=700, quality='A')
+
+
+def test_summary_upkeep_does_not_inspect_the_schema_per_write(app, ledgers):
+    from sqlalchemy import event
+    from app import db
+
+    with app.app_context():
+        db.session.add(_stock_row('Ram Kumar', 'S-A'))
+        db.session.commit()   # first write may check the table once
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            for n in range(3):
+                db.session.add(_stock_row('Ram Kumar', f'S-B{n}'))
+                db.session.commit()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert statements
+    assert not [s for s in statements if 'sqlite_master' in s or 'PRAGMA' in s.upper()]
+
+
+def test_summary_table_recreated_after_a_rolled_back_create(app, ledgers):
+    from app import db
+    from app.ledger_summary import forget_summary_table
+    from app.models import StockistLedgerSummary
+
+    with app.app_context():
+        db.session.execute(db.text('DROP TABLE stockist_ledger_summary'))
+        db.session.commit()
+        forget_summary_table()
+
+        db.session.add(_stock_row('Ram Kumar', 'S-C'))
+        db.session.flush()    # creates the table inside this transaction...
+        db.session.rollback()  # ...which takes it away again
+        assert not db.inspect(db.engine).has_table('stockist_ledger_summary')
+
+        db.session.add(_stock_row('Ram Kumar', 'S-D'))
+        db.session.commit()
+        rows = StockistLedgerSummary.query.filter_by(stockist_id=ledgers['stockist_id']).all()
+        assert rows and sum(row.stock_in_count for row in rows) == 7   # six fixture rows + S-D
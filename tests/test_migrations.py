@@ -0,0 +1,205 @@
+from datetime import date
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+LEGACY_DATES = {
+    1: '2024-06-15',
+    2: '2024-06-16 10:20:30',
+    3: '2024-06-17 10:20:30.123456',
+    4: '2024-06-18T08:00:00',
+    5: '19-06-2024',
+    6: '20/06/2024',
+    7: '2024/06/21',
+    8: '',
+    9: None,
+}
+
+
+def _sql(app, statement, **params):
+    from app import db
+    with app.app_context():
+        result = db.session.execute(db.text(statement), params)
+        rows = result.all() if result.returns_rows else None
+        db.session.commit()
+        return rows
+
+
+def _legacy_purchases(app, dates):
+    for row_id, raw in dates.items():
+        _sql(app, "INSERT INTO purchase (id, date, rst_no, warehouse, seller_name, mobile, net_cost) "
+                  "VALUES (:id, :date, :rst, 'WH0', 'Ram Kumar', '9000000001', 100)",
+             id=row_id, date=raw, rst=f'P{row_id}')
+
+
+def _triggers(app, table):
+    return {name for (name,) in _sql(
+        app, "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = :t", t=table)}
+
+
+# -------------------
+# Purchase.date
+# -------------------
+
+def test_purchase_dates_rewritten_into_a_date_column(legacy_app):
+    from app import db
+    from app.migrations import migrate_purchase_dates
+    from app.models import Purchase
+
+    _legacy_purchases(legacy_app, LEGACY_DATES)
+    with legacy_app.app_context():
+        assert migrate_purchase_dates() == 7   # all but the ISO date and the NULL
+        column = next(c for c in db.inspect(db.engine).get_columns('purchase') if c['name'] == 'date')
+        assert isinstance(column['type'], db.Date)
+        assert dict(db.session.query(Purchase.id, Purchase.date)) == {
+            1: date(2024, 6, 15), 2: date(2024, 6, 16), 3: date(2024, 6, 17), 4: date(2024, 6, 18),
+            5: date(2024, 6, 19), 6: date(2024, 6, 20), 7: date(2024, 6, 21), 8: None, 9: None,
+        }
+        db.session.remove()
+        assert migrate_purchase_dates() == 0   # re-run is a no-op
+
+    assert {'trg_purchase_date_insert_check', 'trg_purchase_date_insert_iso',
+            'trg_purchase_date_update_check', 'trg_purchase_date_update_iso',
+            'trg_purchase_seller_id_insert', 'trg_purchase_seller_id_rename'} <= _triggers(legacy_app, 'purchase')
+
+
+def test_unparseable_purchase_date_aborts_the_migration(legacy_app):
+    from app import db
+    from app.migrations import migrate_purchase_dates
+
+    _legacy_purchases(legacy_app, {1: '19-06-2024', 2: 'sometime in June'})
+    with legacy_app.app_context():
+        with pytest.raises(ValueError, match='sometime in June'):
+            migrate_purchase_dates()
+        column = next(c for c in db.inspect(db.engine).get_columns('purchase') if c['name'] == 'date')
+        assert not isinstance(column['type'], db.Date)
+    assert _sql(legacy_app, "SELECT date FROM purchase WHERE id = 1") == [('19-06-2024',)]
+
+
+def test_outside_writers_cannot_store_unreadable_dates(app, client):
+    # e.g. the admin app writing the legacy format after the migration
+    _sql(app, "INSERT INTO purchase (id, date, rst_no, warehouse, seller_name, mobile, commodity, quantity, "
+              "reduction, net_qty, rate, cost, handling, net_cost, quality) VALUES (100, '15/06/2024', 'X1', "
+              "'WH0', 'Ram Kumar', '9000000001', 'Wheat', 100, 0, 100, 20, 2000, 0, 2000, 'A')")
+    _sql(app, "UPDATE purchase SET date = '2024-06-16 09:00:00' WHERE rst_no = 'P0'")
+    assert _sql(app, "SELECT date FROM purchase WHERE id = 100") == [('2024-06-15',)]
+    assert _sql(app, "SELECT date FROM purchase WHERE rst_no = 'P0'") == [('2024-06-16',)]
+
+    for bad in ('garbage', '2024-13-01', '31/02/2024'):
+        with pytest.raises(IntegrityError, match='purchase.date must be a date'):
+            _sql(app, "UPDATE purchase SET date = :d WHERE id = 100", d=bad)
+    assert client.get('/user/seller').status_code == 200
+
+
+# -------------------
+# Party name -> id
+# -------------------
+
+def _legacy_ledgers(app):
+    """Parties with clashing names, and ledger rows that resolve by mobile, by name only, or not at all."""
+    for table, rows in (
+            ('seller', [(1, 'Ram Kumar', '9000000001'), (2, 'Ram Kumar', '9000000002'), (3, 'Sita Devi', '9000000003')]),
+            ('stockist', [(1, 'Ram Kumar', '9000000002'), (2, 'Ram Kumar', '9000000004')])):
+        for row_id, name, mobile in rows:
+            _sql(app, f"INSERT INTO {table} (id, name, mobile) VALUES (:id, :name, :mobile)",
+                 id=row_id, name=name, mobile=mobile)
+    for row_id, name, mobile in ((1, 'Ram Kumar', '9000000002'),   # mobile picks the second Ram Kumar
+                                 (2, 'Ram Kumar', '9999999999'),   # unknown mobile: oldest Ram Kumar
+                                 (3, 'Sita Devi', None),
+                                 (4, 'Nobody', '9000000001')):     # name matches no seller
+        _purchase(app, row_id, name, mobile)
+    for row_id, name in ((1, 'Ram Kumar'), (2, 'Sita Devi')):      # payment has no mobile column
+        _payment(app, row_id, name)
+    for row_id, mobile in ((1, '9000000004'), (2, None)):
+        _sql(app, "INSERT INTO stock_data (id, date, rst_no, warehouse, stockist_name, mobile, commodity, quantity) "
+                  "VALUES (:id, '2024-06-01', :rst, 'WH0', 'Ram Kumar', :mobile, 'Wheat', 1000)",
+             id=row_id, rst=f'S{row_id}', mobile=mobile)
+    _sql(app, "INSERT INTO loan_data (id, date, stockist_name, warehouse, commodity, loan_type, amount) "
+              "VALUES (1, '2024-06-01', 'Ram Kumar', 'WH0', 'Wheat', 'Cash', 500)")
+    # Name-keyed leftovers an earlier release created
+    _sql(app, "CREATE INDEX ix_purchase_seller_date ON purchase (seller_name, date)")
+    _sql(app, "CREATE TABLE stockist_ledger_summary (stockist_name VARCHAR(100), warehouse VARCHAR(100), "
+              "commodity VARCHAR(50), qty_in FLOAT)")
+
+
+def _purchase(app, row_id, name, mobile):
+    _sql(app, "INSERT INTO purchase (id, date, rst_no, warehouse, seller_name, mobile, net_cost) "
+              "VALUES (:id, '2024-06-01', :rst, 'WH0', :name, :mobile, 100)",
+         id=row_id, rst=f'P{row_id}', name=name, mobile=mobile)
+
+
+def _payment(app, row_id, name):
+    _sql(app, "INSERT INTO payment (id, date, seller_name, warehouse, commodity, banking_name, account_number, "
+              "ifsc, amount_paid, bank_reference) VALUES (:id, '2024-06-01', :name, 'WH0', 'Wheat', 'x', '1', "
+              "'SBIN0000001', 100, :ref)", id=row_id, name=name, ref=f'UTR{row_id}')
+
+
+def _ids(app, table, id_col):
+    return dict(_sql(app, f"SELECT id, {id_col} FROM {table} ORDER BY id"))
+
+
+def _migrate_party_ids(app):
+    result = app.test_cli_runner().invoke(args=['migrate-party-ids'])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def test_party_ids_backfilled_by_mobile_then_name(legacy_app):
+    from app import db
+
+    _legacy_ledgers(legacy_app)
+    output = _migrate_party_ids(legacy_app)
+
+    assert 'purchase: 3 row(s) linked, 1 without a matching party' in output
+    assert 'hidden from dashboards' in output
+    assert _ids(legacy_app, 'purchase', 'seller_id') == {1: 2, 2: 1, 3: 3, 4: None}
+    assert _ids(legacy_app, 'payment', 'seller_id') == {1: 1, 2: 3}
+    assert _ids(legacy_app, 'stock_data', 'stockist_id') == {1: 2, 2: 1}
+    assert _ids(legacy_app, 'loan_data', 'stockist_id') == {1: 1}
+
+    with legacy_app.app_context():
+        inspector = db.inspect(db.engine)
+        purchase_indexes = {ix['name'] for ix in inspector.get_indexes('purchase')}
+        assert 'ix_purchase_seller_date' not in purchase_indexes
+        assert 'ix_purchase_seller_id_date' in purchase_indexes
+        assert not inspector.has_table('stockist_ledger_summary')
+
+
+def test_party_triggers_key_raw_inserts_and_renames(legacy_app):
+    _legacy_ledgers(legacy_app)
+    _migrate_party_ids(legacy_app)
+
+    _purchase(legacy_app, 10, 'Ram Kumar', '9000000002')
+    _purchase(legacy_app, 11, 'Ram Kumar', None)
+    _payment(legacy_app, 10, 'Sita Devi')
+    assert _ids(legacy_app, 'purchase', 'seller_id')[10] == 2
+    assert _ids(legacy_app, 'purchase', 'seller_id')[11] == 1
+    assert _ids(legacy_app, 'payment', 'seller_id')[10] == 3
+
+    # A rename re-keys the row; an unrelated edit leaves the key alone
+    _sql(legacy_app, "UPDATE purchase SET seller_name = 'Sita Devi' WHERE id = 10")
+    _sql(legacy_app, "UPDATE payment SET amount_paid = 5 WHERE id = 10")
+    _sql(legacy_app, "UPDATE purchase SET seller_name = 'Ram Kumar' WHERE id = 4")
+    assert _ids(legacy_app, 'purchase', 'seller_id')[10] == 3
+    assert _ids(legacy_app, 'purchase', 'seller_id')[4] == 1
+    assert _ids(legacy_app, 'payment', 'seller_id')[10] == 3
+
+
+def test_migrate_party_ids_twice_is_a_no_op(legacy_app):
+    from app.party_keys import PARTY_KEYS
+
+    id_columns = {model.__tablename__: id_col for model, (_, _, id_col) in PARTY_KEYS.items()}
+
+    def state():
+        return ({table: _ids(legacy_app, table, col) for table, col in id_columns.items()},
+                {table: _triggers(legacy_app, table) for table in id_columns})
+
+    _legacy_ledgers(legacy_app)
+    _migrate_party_ids(legacy_app)
+    ids, triggers = state()
+    assert all({f'trg_{table}_{col}_insert', f'trg_{table}_{col}_rename'} <= triggers[table]
+               for table, col in id_columns.items())
+
+    output = _migrate_party_ids(legacy_app)
+    assert 'purchase: 0 row(s) linked, 1 without a matching party' in output
+    assert '0 index(es) created.' in output
+    assert state() == (ids, triggers)
@@ -0,0 +1,98 @@
+import re
+import pytest
+from sqlalchemy import event
+
+LEDGER_TABLES = {'purchase', 'payment', 'stock_data', 'stock_exit', 'loan_data', 'margin_data',
+                 'stockist_ledger_summary'}
+
+# Every page that reads a ledger: dashboards, JSON pages, the API and exports
+PAGES = (
+    '/user/seller',
+    '/user/stockist',
+    '/user/seller/purchases',
+    '/user/seller/payments',
+    '/user/api/v1/seller/purchases',
+    '/user/api/v1/seller/payments',
+    '/user/api/v1/stockist/stock',
+    '/user/api/v1/stockist/exits',
+    '/user/api/v1/stockist/loans',
+    '/user/api/v1/stockist/margins',
+    '/user/api/v1/seller/summary',
+    '/user/api/v1/stockist/summary',
+    '/user/api/v1/seller/purchases.csv',
+    '/user/api/v1/stockist/loans.csv',
+)
+
+_ACCESS_RE = re.compile(r'\b(SCAN|SEARCH) (\w+)')
+
+
+def _ledger_queries(app, client, paths):
+    """[(sql, params)] for every SELECT touching a ledger table while serving ``paths``."""
+    from app import db
+
+    with app.app_context():
+        engine = db.engine
+    seen = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        tables = set(re.findall(r'\b\w+\b', statement.lower())) & LEDGER_TABLES
+        if statement.lstrip().upper().startswith(('SELECT', 'WITH')) and tables:
+            seen.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        for path in paths:
+            response = client.get(path)
+            response.get_data()
+            assert response.status_code == 200, path
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+    return seen
+
+
+def _full_scans(app, statement, parameters):
+    from app import db
+
+    with app.app_context():
+        plan = db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+    details = [row[-1] for row in plan]
+    scans = []
+    for detail in details:
+        match = _ACCESS_RE.search(detail)
+        if match and match[2] in LEDGER_TABLES:
+            if match[1] == 'SCAN' or not re.search(r'USING (COVERING )?INDEX|USING INTEGER PRIMARY KEY', detail):
+                scans.append(detail)
+    return scans, details
+
+
+@pytest.mark.parametrize('use_summary', [False, True])
+@pytest.mark.parametrize('stream_rows', [0, 1])
+def test_every_ledger_query_uses_an_index(app, client, use_summary, stream_rows):
+    from app.ledger_summary import rebuild_summaries
+
+    app.config['USE_LEDGER_SUMMARY'] = use_summary
+    app.config['STREAM_HISTORY_ROWS'] = stream_rows  # 1 forces the streamed stockist page
+    if use_summary:
+        with app.app_context():
+            rebuild_summaries()
+
+    queries = _ledger_queries(app, client, PAGES)
+    assert queries
+
+    offenders = []
+    for statement, parameters in queries:
+        scans, details = _full_scans(app, statement, parameters)
+        if scans:
+            offenders.append(f"{' '.join(statement.split())}\n    " + '\n    '.join(details))
+    assert not offenders, 'queries without an index:\n' + '\n\n'.join(offenders)
+
+
+def test_ensure_indexes_restores_missing_indexes(app):
+    from app import db
+    from app.cli import ensure_indexes
+
+    with app.app_context():
+        db.session.execute(db.text('DROP INDEX ix_purchase_seller_id_date'))
+        db.session.commit()
+        assert ensure_indexes() == ['ix_purchase_seller_id_date']
+        assert ensure_indexes() == []
@@ -0,0 +1,49 @@
+import os
+from datetime import date
+
+
+def _store(app):
+    return app.extensions['statements']
+
+
+def test_statement_pdf_is_rendered_and_then_served_from_disk(app, client, ledgers):
+    first = client.get('/user/api/v1/seller/statement.pdf')
+    assert first.status_code == 200
+    assert first.data.startswith(b'%PDF')
+    with app.app_context():
+        store = _store(app)
+        assert store.cached(store.key('seller', ledgers['seller_id'], date.today()))
+    assert client.get('/user/api/v1/seller/statement.pdf').data == first.data
+
+
+def test_statement_removed_after_lookup_is_rebuilt(app, client, ledgers, monkeypatch):
+    # cached() saw the file, then a newer build of the same party deleted it
+    store = _store(app)
+    monkeypatch.setattr(store, 'cached', lambda key: os.path.join(store.directory, 'seller-gone.pdf'))
+    response = client.get('/user/api/v1/seller/statement.pdf')
+    assert response.status_code == 200
+    assert response.data.startswith(b'%PDF')
+
+
+def test_superseded_statement_stays_readable_while_open(app, client, ledgers):
+    from app import db
+    from app.models import Payment
+    from app.routes.user.api import _open_pdf
+
+    store = _store(app)
+    with app.app_context():
+        old_path = store.build('seller', ledgers['seller_id'])
+    with open(old_path, 'rb') as fh:
+        expected = fh.read()
+    pdf = _open_pdf(old_path)  # as a request sending it would hold it
+
+    with app.app_context():
+        db.session.add(Payment(date=date(2024, 9, 1), seller_name='Ram Kumar', warehouse='WH0', commodity='Wheat',
+                               banking_name='Ram', account_number='1', ifsc='SBIN0000001', amount_paid=10,
+                               bank_reference='UTR-LATE'))
+        db.session.commit()
+        new_path = store.build('seller', ledgers['seller_id'])
+
+    assert new_path != old_path and not os.path.exists(old_path)
+    with pdf:
+        assert pdf.read() == expected
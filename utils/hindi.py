@@ -1,12 +1,149 @@
 from functools import lru_cache
+import os
 import re
+import sqlite3
+import threading
+import time
 
-# Optional online translator
-try:
-    from deep_translator import GoogleTranslator
-    _gt = GoogleTranslator(source="auto", target="hi")
-except Exception:
-    _gt = None
+# --- Optional online translator (created lazily on the first real miss) ---
+_translator = None       # None = not tried yet, False = unavailable
+_translator_lock = threading.Lock()
+
+
+def get_translator():
+    global _translator
+    if _translator is None:
+        with _translator_lock:
+            if _translator is None:
+                try:
+                    from deep_translator import GoogleTranslator
+                    _translator = NewlineBatchBackend(GoogleTranslator(source="auto", target="hi"))
+                except Exception:
+                    _translator = False
+    return _translator if _translator is not False else None
+
+
+class NewlineBatchBackend:
+    """Wraps a translator whose translate_batch costs one request per text (GoogleTranslator).
+
+    The words go out newline-joined in as few translate() calls as the length
+    limit allows, one for a typical page, and the reply is split back per line.
+    """
+
+    MAX_CHARS = 4999  # deep_translator rejects 5000 characters or more
+
+    def __init__(self, translator):
+        self.translator = translator
+
+    def translate(self, text):
+        return self.translator.translate(text)
+
+    def translate_batch(self, words):
+        out = []
+        for chunk in self._chunks(words):
+            lines = (self.translator.translate("\n".join(chunk)) or "").split("\n")
+            if len(lines) != len(chunk):
+                # Lines were merged or dropped, so they can't be matched back to words
+                lines = [""] * len(chunk)
+            out.extend(line.strip() for line in lines)
+        return out
+
+    def _chunks(self, words):
+        chunk, size = [], 0
+        for word in words:
+            if chunk and size + len(word) + 1 > self.MAX_CHARS:
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(word)
+            size += len(word) + 1
+        if chunk:
+            yield chunk
+
+
+def set_translator(translator):
+    """Swap the remote backend (e.g. a StaticBackend in tests); None disables it."""
+    global _translator
+    _translator = translator if translator is not None else False
+    breaker.reset()
+
+
+class CircuitBreaker:
+    """Stops remote lookups after ``max_failures`` consecutive failures or slow calls.
+
+    A call still running after ``slow_call`` seconds is abandoned and counted as
+    a failure.
+
+    While open, translations fall straight through to the phonetic fallback so a
+    page render never waits on the network; one trial call is let through again
+    after ``reset_after`` seconds.
+    """
+
+    def __init__(self, max_failures=3, reset_after=300.0, slow_call=2.0):
+        self.max_failures = max_failures
+        self.reset_after = reset_after
+        self.slow_call = slow_call
+        self.reset()
+
+    def reset(self):
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None and time.monotonic() - self.opened_at < self.reset_after
+
+    def allow(self):
+        return not self.is_open
+
+    def record(self, ok, elapsed):
+        if ok and elapsed <= self.slow_call:
+            self.reset()
+            return
+        self.failures += 1
+        if self.failures >= self.max_failures:
+            self.opened_at = time.monotonic()
+
+
+breaker = CircuitBreaker()
+
+# Remote calls run here so a hung request can be abandoned after breaker.slow_call
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _translator_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from concurrent.futures import ThreadPoolExecutor
+                _pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hindi-translate")
+    return _pool
+
+
+def _call_translator(method, arg, backend=None):
+    # None when the breaker is open, no backend (or method) is available or the call fails or times out.
+    if not breaker.allow():
+        return None
+    backend = backend if backend is not None else get_translator()
+    if backend is None:
+        return None
+    call = getattr(backend, method, None)
+    if call is None:
+        # e.g. a batch-only backend asked for one word: a miss, not a failing remote
+        return None
+    start = time.monotonic()
+    future = _translator_pool().submit(call, arg)
+    try:
+        # deep_translator has no timeout of its own; a timed-out call finishes in
+        # the background and its result is dropped
+        result = future.result(timeout=breaker.slow_call)
+    except Exception:
+        future.cancel()
+        breaker.record(False, time.monotonic() - start)
+        return None
+    breaker.record(True, time.monotonic() - start)
+    return result
 
 # --- Domain overrides (lowercase keys). Add more as needed. ---
 OVERRIDES = {
@@ -29,63 +166,245 @@ OVERRIDES = {
 
 _ASCII_RE = re.compile(r"[A-Za-z]")
 
+# --- Persistent translation store (shared by every worker process) ---
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(__file__), '..', 'instance', 'hindi_cache.db')
+
+
+class TranslationStore:
+    """SQLite-backed word -> Hindi map; survives restarts and is shared across processes."""
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations (source TEXT PRIMARY KEY, hindi TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, source):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hindi FROM translations WHERE source = ?", (source,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, source, hindi):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations (source, hindi) VALUES (?, ?)", (source, hindi)
+            )
+            self._conn.commit()
+
+    def get_many(self, sources) -> dict:
+        sources = list(sources)
+        found = {}
+        with self._lock:
+            for i in range(0, len(sources), 500):  # stay under SQLite's variable limit
+                chunk = sources[i:i + 500]
+                found.update(self._conn.execute(
+                    "SELECT source, hindi FROM translations WHERE source IN (%s)" % ",".join("?" * len(chunk)),
+                    chunk,
+                ).fetchall())
+            self.hits += len(found)
+            self.misses += len(sources) - len(found)
+        return found
+
+    def put_many(self, pairs: dict):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations (source, hindi) VALUES (?, ?)", pairs.items()
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    # Opened lazily; None when the store file cannot be created (e.g. read-only disk).
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                try:
+                    _store = TranslationStore(os.environ.get("HINDI_CACHE_PATH", DEFAULT_STORE_PATH))
+                except (OSError, sqlite3.Error):
+                    _store = False
+    return _store if _store is not False else None
+
+
+def cache_stats() -> dict:
+    info = to_hindi_name.cache_info()
+    store = get_store()
+    return {
+        "memory_hits": info.hits,
+        "memory_misses": info.misses,
+        "memory_size": info.currsize,
+        "store_hits": store.hits if store is not None else 0,
+        "store_misses": store.misses if store is not None else 0,
+        "store_size": len(store) if store is not None else 0,
+        "translator_failures": breaker.failures,
+        "translator_circuit_open": breaker.is_open,
+    }
+
+
+def warm_cache(values) -> int:
+    """Resolve every distinct value once so the store (and this process) are primed.
+
+    Unknown words go out in one batch through the circuit breaker; the
+    per-value pass then finds the batch's translations in the store, and a dead
+    translator costs at most ``max_failures`` ``slow_call`` waits before the
+    breaker opens.
+    """
+    distinct = {v for v in values if v}
+    to_hindi_batch(distinct)
+    for value in distinct:
+        to_hindi_name(value)
+    return len(distinct)
+
 def _looks_latin(s: str) -> bool:
     return bool(_ASCII_RE.search(s or ""))
 
-@lru_cache(maxsize=4096)
-def to_hindi_name(value: str) -> str:
-    if not value:
-        return value
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]+|\s+")
 
-    # Tokenize into words/non-words so we can apply overrides per word
-    tokens = re.findall(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]+|\s+", value)
+
+def _assemble(tokens, translated) -> str:
+    # Overrides first, then any translation we have, else the phonetic fallback
     out_parts = []
     for tok in tokens:
         if tok.isalpha():  # word made of letters
             lower = tok.lower()
-            # 1) Exact override hit?
             if lower in OVERRIDES:
                 out_parts.append(OVERRIDES[lower])
-                continue
-            # 2) Try online translator once per word
-            if _gt is not None:
-                try:
-                    gt = _gt.translate(tok)
-                    if gt and gt.strip() and not _looks_latin(gt):
-                        out_parts.append(gt)
-                        continue
-                except Exception:
-                    pass
-            # 3) Fallback phonetic (very light)
-            out_parts.append(_phonetic_word(lower))
+            elif translated.get(tok):
+                out_parts.append(translated[tok])
+            else:
+                # Fallback phonetic (very light; not persisted so a later translation wins)
+                out_parts.append(_phonetic_word(lower))
         else:
             out_parts.append(tok)
     return "".join(out_parts)
 
+
+def _translate_word(tok):
+    # 1) Earlier translation persisted by any worker?
+    store = get_store()
+    stored = store.get(tok) if store is not None else None
+    if stored:
+        return stored
+    # 2) Try online translator once per word
+    gt = _call_translator("translate", tok)
+    if gt and gt.strip() and not _looks_latin(gt):
+        if store is not None:
+            store.put(tok, gt)
+        return gt
+    return None
+
+
+@lru_cache(maxsize=4096)
+def to_hindi_name(value: str) -> str:
+    if not value:
+        return value
+
+    # Tokenize into words/non-words so we can apply overrides per word
+    tokens = _TOKEN_RE.findall(value)
+    translated = {
+        tok: _translate_word(tok)
+        for tok in tokens
+        if tok.isalpha() and tok.lower() not in OVERRIDES
+    }
+    return _assemble(tokens, translated)
+
+
+# --- Batch mode: one translator round-trip for a whole page ---
+
+class StaticBackend:
+    """Local stand-in for GoogleTranslator: looks words up in a dict (unknown -> no translation)."""
+
+    def __init__(self, mapping=None):
+        self.mapping = dict(mapping or {})
+        self.calls = 0
+
+    def translate(self, word):
+        self.calls += 1
+        return self.mapping.get(word, "")
+
+    def translate_batch(self, words):
+        self.calls += 1
+        return [self.mapping.get(w, "") for w in words]
+
+
+def to_hindi_batch(values, backend=None) -> dict:
+    """{value: hindi} for every distinct value, translating all unknown words in one batch.
+
+    Overrides and the persistent store are consulted first; only the remaining
+    words go to ``backend.translate_batch`` (defaults to the Google translator).
+    """
+    tokenized = {v: _TOKEN_RE.findall(v) for v in set(values) if v}
+    words = {
+        tok
+        for tokens in tokenized.values()
+        for tok in tokens
+        if tok.isalpha() and tok.lower() not in OVERRIDES
+    }
+
+    store = get_store()
+    translated = store.get_many(words) if store is not None else {}
+    misses = sorted(words - translated.keys())
+
+    if misses:
+        results = _call_translator("translate_batch", misses, backend)
+        fresh = {
+            w: gt for w, gt in zip(misses, results or [])
+            if gt and gt.strip() and not _looks_latin(gt)
+        }
+        if fresh and store is not None:
+            store.put_many(fresh)
+        translated.update(fresh)
+
+    return {v: _assemble(tokens, translated) for v, tokens in tokenized.items()}
+
+# --- Phonetic fallback tables ---
+# Order matters: at any position the first listed pattern wins, which reproduces
+# the old pass-by-pass str.replace chain (digraphs, then vowel groups).
+_DIGRAPHS = [
+    ("sh", "श"), ("chh", "छ"), ("ch", "च"),
+    ("kh", "ख"), ("gh", "घ"), ("th", "थ"), ("dh", "ध"),
+    ("ph", "फ"), ("bh", "भ"), ("wh", "व"), ("qu", "क्व"),
+]
+_VOWEL_GROUPS = [("aa", "आ"), ("ee", "ई"), ("oo", "ऊ"), ("ai", "ऐ"), ("au", "औ")]
+_SINGLES = {
+    # vowels (rough)
+    "a": "अ", "e": "ए", "i": "इ", "o": "ओ", "u": "उ",
+    # consonants
+    "k":"क","g":"ग","c":"क","j":"ज","t":"त","d":"द","n":"न",
+    "p":"प","b":"ब","m":"म","y":"य","r":"र","l":"ल","v":"व","w":"व",
+    "s":"स","h":"ह","q":"क","x":"क्स","z":"ज़","f":"फ",
+}
+
+_MULTI = dict(_DIGRAPHS + _VOWEL_GROUPS)
+_MULTI_RE = re.compile("|".join(re.escape(a) for a, _ in _DIGRAPHS + _VOWEL_GROUPS))
+_SINGLES_TABLE = str.maketrans(_SINGLES)
+
+
 def _phonetic_word(w: str) -> str:
     # Very minimal fallback: helps for simple syllables,
     # but rely on OVERRIDES for business terms / names.
-    t = w
-    # common digraphs
-    for a, b in [
-        ("sh", "श"), ("chh", "छ"), ("ch", "च"),
-        ("kh", "ख"), ("gh", "घ"), ("th", "थ"), ("dh", "ध"),
-        ("ph", "फ"), ("bh", "भ"), ("wh", "व"), ("qu", "क्व"),
-    ]:
-        t = t.replace(a, b)
-
-    # quick vowel groups
-    for a, b in [("aa", "आ"), ("ee", "ई"), ("oo", "ऊ"), ("ai", "ऐ"), ("au", "औ")]:
-        t = t.replace(a, b)
-
-    # singles (rough)
-    t = (t.replace("a", "अ").replace("e", "ए").replace("i", "इ")
-           .replace("o", "ओ").replace("u", "उ"))
-
-    # consonants
-    cons = {
-        "k":"क","g":"ग","c":"क","j":"ज","t":"त","d":"द","n":"न",
-        "p":"प","b":"ब","m":"म","y":"य","r":"र","l":"ल","v":"व","w":"व",
-        "s":"स","h":"ह","q":"क","x":"क्स","z":"ज़","f":"फ",
-    }
-    return "".join(cons.get(ch, ch) for ch in t)
+    # One scan for digraphs/vowel groups, then one translate() for single letters.
+    if _MULTI_RE.search(w):
+        w = _MULTI_RE.sub(lambda m: _MULTI[m[0]], w)
+    return w.translate(_SINGLES_TABLE)